@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
 from community.models import Community
+from trainerdex.admin import get_target_group_actions
+from trainerdex.models import Trainer
 
 
 @admin.register(Community)
@@ -28,6 +30,14 @@ class CommunityAdmin(admin.ModelAdmin):
         ),
     ]
 
+    def get_actions(self, request):
+        return {
+            **super().get_actions(request),
+            **get_target_group_actions(
+                lambda queryset: Trainer.objects.filter(communities__in=queryset)
+            ),
+        }
+
     def get_readonly_fields(self, request, obj=None):
         if obj:  # editing an existing object
             return self.readonly_fields + ["handle"]
@@ -1,10 +1,14 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _, npgettext_lazy, pgettext_lazy
 
 from django_countries.fields import CountryField
 from timezone_field import TimeZoneField
 
+from trainerdex.cache import LeaderboardCache
+from trainerdex.leaderboard import Leaderboard
 from trainerdex.models import Trainer
 
 
@@ -75,7 +79,14 @@ class Community(models.Model):
     country_flag.short_description = country.verbose_name
 
     def get_leaderboard(self, legacy_mode: bool = False, order_by: str = "total_xp"):
-        return self.members.default_excludes().get_leaderboard(legacy_mode, order_by)
+        """The community's leaderboard, cached until its members or their stats change"""
+        return Leaderboard(
+            legacy_mode,
+            order_by,
+            queryset=self.members.default_excludes(),
+            cache=LeaderboardCache({"communities": [self.pk]}),
+            community=self.pk,
+        )
 
     def __str__(self) -> str:
         return self.name
@@ -83,3 +94,18 @@ class Community(models.Model):
     class Meta:
         verbose_name = npgettext_lazy("community__title", "community", "communities", 1)
         verbose_name_plural = npgettext_lazy("community__title", "community", "communities", 2)
+
+
+@receiver(m2m_changed, sender=Community.members.through)
+def invalidate_community_leaderboards(
+    sender, instance, action: str, reverse: bool, pk_set, **kwargs
+) -> None:
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return None
+
+    if reverse:
+        # Changed from the trainer's side, so `pk_set` holds communities
+        communities = pk_set or instance.community_set.values_list("pk", flat=True)
+    else:
+        communities = [instance.pk]
+    LeaderboardCache.invalidate(f"community:{pk}" for pk in communities)
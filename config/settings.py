@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/3.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
+
 import os
 from pathlib import Path
 
@@ -63,6 +64,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "trainerdex.instrumentation.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
@@ -75,6 +77,11 @@ MIDDLEWARE = [
     "oauth2_provider.middleware.OAuth2TokenMiddleware",
 ]
 
+# Send each request's query count and timings in a Server-Timing header
+SERVER_TIMING = env("SERVER_TIMING", DEBUG)
+# Keep the SQL of each request's queries too, set by `QueryBudgetMixin` to show what went over
+QUERY_METRICS_STATEMENTS = False
+
 LOCALE_PATHS = [
     "config/locale",
 ]
@@ -126,6 +133,20 @@ DATABASES = {
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": env("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": env("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+
+# Seconds a leaderboard page is served from the cache if nothing on it changes
+LEADERBOARD_CACHE_TIMEOUT = env("LEADERBOARD_CACHE_TIMEOUT", 60)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
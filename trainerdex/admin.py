@@ -1,3 +1,5 @@
+from typing import Dict, Tuple
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
@@ -16,6 +18,30 @@ from trainerdex.models import (
 )
 from trainerdex.models import TrainerQuerySet
 
+
+def get_target_group_actions(get_trainers=lambda queryset: queryset) -> Dict[str, Tuple]:
+    """An action for each `PresetTargetGroup`, adding its targets to the selected trainers
+
+    Parameters
+    ----------
+    get_trainers: callable
+        Turns the selected objects into the trainers to add the targets to
+    """
+    actions = {}
+    for group in PresetTargetGroup.objects.all():
+
+        def add_target_group(modeladmin, request, queryset, group=group):
+            count = group.add_to_trainers(get_trainers(queryset))
+            modeladmin.message_user(
+                request,
+                _("Added {group}, {count} targets checked").format(group=group, count=count),
+            )
+
+        name = f"add_target_group_{group.pk}"
+        actions[name] = (add_target_group, name, _("Add targets: {group}").format(group=group))
+    return actions
+
+
 admin.site.register(PresetTargetGroup)
 
 
@@ -43,9 +69,7 @@ class PresetTargetAdmin(admin.ModelAdmin):
 
 
 def force_check_target(modeladmin, request, queryset):
-    for x in queryset:
-        x.check_reached()
-        x.save(update_fields=["has_reached", "date_reached"])
+    queryset.check_reached()
 
 
 force_check_target.short_description = "Check if this target has been reached"
@@ -203,6 +227,32 @@ class TargetInline(admin.TabularInline):
         return super().get_queryset(request).filter(has_reached=False)
 
 
+class AwaitingVerificationFilter(admin.SimpleListFilter):
+    title = _("awaiting verification")
+    parameter_name = "awaiting_verification"
+
+    def lookups(self, request, model_admin):
+        return [("1", _("Yes"))]
+
+    def queryset(self, request, queryset):
+        if self.value() == "1":
+            return queryset.awaiting_verification()
+        return queryset
+
+
+class PendingEvidenceFilter(admin.SimpleListFilter):
+    title = _("review")
+    parameter_name = "pending"
+
+    def lookups(self, request, model_admin):
+        return [("1", _("Submitted, awaiting approval"))]
+
+    def queryset(self, request, queryset):
+        if self.value() == "1":
+            return queryset.pending()
+        return queryset
+
+
 @admin.register(Trainer)
 class TrainerAdmin(UserAdmin):
     list_display = [
@@ -216,6 +266,7 @@ class TrainerAdmin(UserAdmin):
         "is_banned",
         "is_active",
         "is_verified",
+        AwaitingVerificationFilter,
     ]
     search_fields = [
         "codenames__codename",
@@ -280,6 +331,9 @@ class TrainerAdmin(UserAdmin):
             return self.readonly_fields + ["username"]
         return self.readonly_fields
 
+    def get_actions(self, request) -> Dict[str, Tuple]:
+        return {**super().get_actions(request), **get_target_group_actions()}
+
     def get_queryset(self, request) -> TrainerQuerySet:
         return (
             super()
@@ -304,10 +358,12 @@ class EvidenceAdmin(AddFieldsetsMixin, admin.ModelAdmin):
         "content_field",
     ]
     list_filter = [
+        PendingEvidenceFilter,
         "approval",
         "content_type",
         "content_field",
     ]
+    list_select_related = ["content_type"]
     readonly_fields = [
         "content_object",
     ]
@@ -337,6 +393,10 @@ class EvidenceAdmin(AddFieldsetsMixin, admin.ModelAdmin):
         EvidenceImageInline,
     ]
 
+    def get_queryset(self, request):
+        # Resolves `trainer` for the whole page, a query per content type rather than per row
+        return super().get_queryset(request).prefetch_related("content_object")
+
     def get_readonly_fields(self, request, obj=None):
         if obj:  # editing an existing object
             return self.readonly_fields + ["content_field"]
@@ -0,0 +1,91 @@
+"""Answers conditional GETs without building the response
+
+Detail and list responses get an `ETag`, worked out from the `last_modified` of the rows behind
+them in an aggregate query, and a request sending it back with `If-None-Match` gets a 304 if
+nothing has changed since. A single object also gets a `Last-Modified`, for `If-Modified-Since`.
+Nothing is serialized for a 304, which is the point: bots polling for new updates cost two small
+queries.
+"""
+
+import hashlib
+from calendar import timegm
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Count, Max, QuerySet
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """Adds conditional GETs to a viewset's `list` and `retrieve`, see the module docstring
+
+    Views whose responses are built from more than their queryset, such as a trainer and their
+    updates, list the rest in `get_freshness_querysets`. Rows are counted as well as their
+    latest `last_modified` taken, as a deletion wouldn't change the latter.
+    """
+
+    last_modified_field = "last_modified"
+
+    def get_freshness_queryset(self) -> QuerySet:
+        """The rows a list or detail view would return, without the cost of returning them"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_freshness_querysets(self) -> List[QuerySet]:
+        return [self.get_freshness_queryset()]
+
+    def get_validators(self, request) -> Tuple[Optional[str], Optional[datetime]]:
+        """The `ETag` and latest modification of the response
+
+        Returns `(None, None)` if the first queryset is empty, so a missing object 404s as usual.
+        The latest modification is None unless the response is a single object and nothing else,
+        as a row deleted from a list leaves the latest `last_modified` of the rest as it was.
+        """
+        latest = None
+        fingerprint = [request.accepted_renderer.media_type]
+        querysets = self.get_freshness_querysets()
+        for queryset in querysets:
+            freshness = queryset.order_by().aggregate(
+                latest=Max(self.last_modified_field), count=Count("pk")
+            )
+            if len(fingerprint) == 1 and not freshness["count"]:
+                return None, None
+            if freshness["latest"] and (latest is None or freshness["latest"] > latest):
+                latest = freshness["latest"]
+            fingerprint += [
+                freshness["latest"] and freshness["latest"].isoformat(),
+                freshness["count"],
+            ]
+        etag = f'"{hashlib.md5(repr(fingerprint).encode()).hexdigest()}"'
+        if not (self.action == "retrieve" and len(querysets) == 1):
+            return etag, None
+        return etag, latest
+
+    def conditional(self, request, handler, *args, **kwargs) -> HttpResponseBase:
+        """Calls `handler` for the response, unless the client's copy is still fresh"""
+        if request.method not in ("GET", "HEAD"):
+            return handler(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 206, 304):
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(request, super().retrieve, *args, **kwargs)
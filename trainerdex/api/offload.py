@@ -0,0 +1,67 @@
+"""Runs the read-only hot endpoints off the event loop under ASGI
+
+DRF views are synchronous, and Django runs every synchronous view on one shared thread when
+served over ASGI, so a slow leaderboard holds up every other request behind it. Views using
+`OffloadedReadsMixin` are served as async views instead, which hand their reads to a pool of
+worker threads, each with its own database connection, and leave the event loop free to take
+other requests meanwhile. Writes still run where Django would run them.
+
+Under WSGI nothing changes, the view runs in the request's thread on the request's connection,
+as it does for the test client too.
+"""
+
+import functools
+from contextlib import nullcontext
+from typing import Callable, Collection
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connection
+
+
+def run_in_worker(view: Callable, request, *args, **kwargs):
+    """Calls `view` as if it were its own request, on a worker thread's connection"""
+    # A worker's connection isn't opened or closed with the request, so is checked like one
+    close_old_connections()
+    metrics = getattr(request, "query_metrics", None)
+    try:
+        with connection.execute_wrapper(metrics.timer) if metrics else nullcontext():
+            return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def offload(view: Callable, methods: Collection[str]) -> Callable:
+    """An async version of `view` that runs requests of any of `methods` on a worker thread"""
+    offloaded = sync_to_async(functools.partial(run_in_worker, view), thread_sensitive=False)
+    inline = sync_to_async(view, thread_sensitive=True)
+    methods = {method.upper() for method in methods}
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method in methods and isinstance(request, ASGIRequest):
+            return await offloaded(request, *args, **kwargs)
+        return await inline(request, *args, **kwargs)
+
+    return async_view
+
+
+class OffloadedReadsMixin:
+    """Serves a view with `offload`, for the actions in `offloaded_actions`
+
+    For a viewset these are its actions, such as `list` and `retrieve`, otherwise its handlers.
+    """
+
+    offloaded_actions: Collection[str] = ("get",)
+
+    @classmethod
+    def as_view(cls, *args, **kwargs) -> Callable:
+        view = super().as_view(*args, **kwargs)
+        actions = getattr(view, "actions", None)
+        if actions is None:
+            actions = {method: method for method in cls.http_method_names}
+            actions["head"] = "get"
+        methods = [method for method, action in actions.items() if action in cls.offloaded_actions]
+        if not methods:
+            return view
+        return offload(view, methods)
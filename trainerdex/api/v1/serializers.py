@@ -1,8 +1,11 @@
-﻿from typing import Dict, List, Union
+﻿from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from allauth.socialaccount.models import SocialAccount
+from django.db.models import Manager, QuerySet
 from rest_framework import serializers
 
+from trainerdex.fields import PogoDecimalField, PogoPositiveIntegerField
 from trainerdex.models import Trainer, Update
 
 v1_field_names = {
@@ -86,278 +89,148 @@ v1_field_names = {
 }
 
 
-class BriefUpdateSerializer(serializers.ModelSerializer):
-    xp = serializers.SerializerMethodField()
-    trainer = serializers.SerializerMethodField()
-    modified_extra_fields = serializers.SerializerMethodField()
-
-    def get_xp(self, obj: Update) -> int:
-        """This field is deprecated and will be removed in API v2"""
-        return getattr(obj, "total_xp")
-
-    def get_trainer(self, obj: Update) -> int:
-        return getattr(obj, "trainer").tid
-
-    def get_modified_extra_fields(self, obj: Update) -> List[str]:
-        return [v1_field_names["update"][x] for x in obj.modified_extra_fields()]
+def get_representation(name: str) -> Optional[Callable[[Any], Any]]:
+    """How v1 represents a field of an update, None if it's passed through as it is"""
+    if name == "uuid":
+        return serializers.UUIDField().to_representation
+    if name in ("update_time", "submission_date"):
+        return serializers.DateTimeField().to_representation
+    if name == "travel_km":
+        # Always sent as a string, even when it's empty
+        return str
+    return None
+
+
+class UpdateEncoder:
+    """Encodes updates with v1's field names, from `.values()` rows or instances
+
+    The v1 name, lookup and representation of every column are worked out once,
+    so each update is a single pass over its columns.
+    """
+
+    stat_fields = [
+        field.name
+        for field in Update._meta.fields
+        if isinstance(field, (PogoDecimalField, PogoPositiveIntegerField))
+    ]
+
+    def __init__(self, fields: List[Tuple[str, str]], modified: Optional[str] = None) -> None:
+        """
+        Parameters
+        ----------
+        fields: list
+            Pairs of the v1 name and the field of `Update` it's read from
+        modified: str
+            If given, the v1 name to list the stats an update has filled in under
+        """
+        self.columns = [
+            (v1_name, "trainer__tid" if name == "trainer" else name, get_representation(name))
+            for v1_name, name in fields
+        ]
+        self.modified = modified
+        self.lookups = list(dict.fromkeys(lookup for _, lookup, _ in self.columns))
+        if modified is not None:
+            self.lookups = list(dict.fromkeys(self.lookups + self.stat_fields))
+        # The fields of `Update` that are read, for `QuerySet.only`
+        self.fields = list(dict.fromkeys(lookup.split("__")[0] for lookup in self.lookups))
+        self.getters = [(lookup, attrgetter(lookup.replace("__", "."))) for lookup in self.lookups]
+
+    def encode_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        data = {}
+        for v1_name, lookup, to_representation in self.columns:
+            value = row[lookup]
+            data[v1_name] = value if to_representation is None else to_representation(value)
+        if self.modified is not None:
+            data[self.modified] = [
+                v1_field_names["update"][name] for name in self.stat_fields if row[name]
+            ]
+        return data
+
+    def encode_instance(self, instance: Update) -> Dict[str, Any]:
+        return self.encode_row({lookup: getter(instance) for lookup, getter in self.getters})
+
+    def encode(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.encode_row(row) for row in rows]
+
+
+class UpdateListSerializer(serializers.ListSerializer):
+    def to_representation(self, data) -> List[Dict[str, Any]]:
+        """Querysets are read as `.values()` rows, anything else is encoded as it is"""
+        encoder = self.child.encoder
+        if isinstance(data, Manager):
+            data = data.all()
+        if isinstance(data, QuerySet):
+            return encoder.encode(data.values(*encoder.lookups))
+        return [encoder.encode_instance(instance) for instance in data]
+
+
+class BriefUpdateSerializer(serializers.BaseSerializer):
+    encoder = UpdateEncoder(
+        [
+            ("uuid", "uuid"),
+            ("trainer", "trainer"),
+            ("update_time", "update_time"),
+            # This field is deprecated and will be removed in API v2
+            ("xp", "total_xp"),
+            ("total_xp", "total_xp"),
+        ],
+        modified="modified_extra_fields",
+    )
+
+    def to_representation(self, instance: Update) -> Dict[str, Any]:
+        return self.encoder.encode_instance(instance)
 
     class Meta:
-        model = Update
-        fields = (
-            "uuid",
-            "trainer",
-            "update_time",
-            "xp",
-            "total_xp",
-            "modified_extra_fields",
-        )
-
-
-class DetailedUpdateSerializer(serializers.ModelSerializer):
-    trainer = serializers.SerializerMethodField()
-    pokedex_caught = serializers.SerializerMethodField()
-    pokedex_seen = serializers.SerializerMethodField()
-    badge_pokedex_entries = serializers.SerializerMethodField()
-    badge_pokedex_entries_gen2 = serializers.SerializerMethodField()
-    badge_pokedex_entries_gen3 = serializers.SerializerMethodField()
-    badge_pokedex_entries_gen4 = serializers.SerializerMethodField()
-    badge_pokedex_entries_gen5 = serializers.SerializerMethodField()
-    badge_pokedex_entries_gen6 = serializers.SerializerMethodField()
-    badge_pokedex_entries_gen7 = serializers.SerializerMethodField()
-    badge_pokedex_entries_gen8 = serializers.SerializerMethodField()
-    badge_travel_km = serializers.SerializerMethodField()
-    badge_capture_total = serializers.SerializerMethodField()
-    badge_evolved_total = serializers.SerializerMethodField()
-    badge_hatched_total = serializers.SerializerMethodField()
-    badge_pokestops_visited = serializers.SerializerMethodField()
-    badge_big_magikarp = serializers.SerializerMethodField()
-    badge_battle_attack_won = serializers.SerializerMethodField()
-    badge_battle_training_won = serializers.SerializerMethodField()
-    badge_small_rattata = serializers.SerializerMethodField()
-    badge_pikachu = serializers.SerializerMethodField()
-    badge_unown = serializers.SerializerMethodField()
-    badge_raid_battle_won = serializers.SerializerMethodField()
-    badge_legendary_battle_won = serializers.SerializerMethodField()
-    badge_berries_fed = serializers.SerializerMethodField()
-    badge_hours_defended = serializers.SerializerMethodField()
-    badge_challenge_quests = serializers.SerializerMethodField()
-    badge_max_level_friends = serializers.SerializerMethodField()
-    badge_trading = serializers.SerializerMethodField()
-    badge_trading_distance = serializers.SerializerMethodField()
-    badge_great_league = serializers.SerializerMethodField()
-    badge_ultra_league = serializers.SerializerMethodField()
-    badge_master_league = serializers.SerializerMethodField()
-    badge_photobomb = serializers.SerializerMethodField()
-    badge_pokemon_purified = serializers.SerializerMethodField()
-    badge_rocket_grunts_defeated = serializers.SerializerMethodField()
-    badge_buddy_best = serializers.SerializerMethodField()
-    badge_wayfarer = serializers.SerializerMethodField()
-    badge_type_normal = serializers.SerializerMethodField()
-    badge_type_fighting = serializers.SerializerMethodField()
-    badge_type_flying = serializers.SerializerMethodField()
-    badge_type_poison = serializers.SerializerMethodField()
-    badge_type_ground = serializers.SerializerMethodField()
-    badge_type_rock = serializers.SerializerMethodField()
-    badge_type_bug = serializers.SerializerMethodField()
-    badge_type_ghost = serializers.SerializerMethodField()
-    badge_type_steel = serializers.SerializerMethodField()
-    badge_type_fire = serializers.SerializerMethodField()
-    badge_type_water = serializers.SerializerMethodField()
-    badge_type_grass = serializers.SerializerMethodField()
-    badge_type_electric = serializers.SerializerMethodField()
-    badge_type_psychic = serializers.SerializerMethodField()
-    badge_type_ice = serializers.SerializerMethodField()
-    badge_type_dragon = serializers.SerializerMethodField()
-    badge_type_dark = serializers.SerializerMethodField()
-    badge_type_fairy = serializers.SerializerMethodField()
-    gymbadges_total = serializers.SerializerMethodField()
-    gymbadges_gold = serializers.SerializerMethodField()
-    pokemon_info_stardust = serializers.SerializerMethodField()
-
-    def get_trainer(self, obj: Update) -> int:
-        return getattr(obj, "trainer").tid
-
-    def get_xp(self, obj: Update) -> int:
-        """This field is deprecated and will be removed in API v2"""
-        return getattr(obj, "total_xp")
-
-    def get_pokedex_caught(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_total_caught")
-
-    def get_pokedex_seen(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_total_seen")
-
-    def get_badge_pokedex_entries(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_gen1")
-
-    def get_badge_pokedex_entries_gen2(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_gen2")
-
-    def get_badge_pokedex_entries_gen3(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_gen3")
-
-    def get_badge_pokedex_entries_gen4(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_gen4")
-
-    def get_badge_pokedex_entries_gen5(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_gen5")
-
-    def get_badge_pokedex_entries_gen6(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_gen6")
-
-    def get_badge_pokedex_entries_gen7(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_gen7")
-
-    def get_badge_pokedex_entries_gen8(self, obj: Update) -> int:
-        return getattr(obj, "pokedex_gen8")
-
-    def get_badge_travel_km(self, obj: Update) -> str:
-        return str(getattr(obj, "travel_km"))
-
-    def get_badge_capture_total(self, obj: Update) -> int:
-        return getattr(obj, "capture_total")
-
-    def get_badge_evolved_total(self, obj: Update) -> int:
-        return getattr(obj, "evolved_total")
-
-    def get_badge_hatched_total(self, obj: Update) -> int:
-        return getattr(obj, "hatched_total")
-
-    def get_badge_pokestops_visited(self, obj: Update) -> int:
-        return getattr(obj, "pokestops_visited")
-
-    def get_badge_big_magikarp(self, obj: Update) -> int:
-        return getattr(obj, "big_magikarp")
-
-    def get_badge_battle_attack_won(self, obj: Update) -> int:
-        return getattr(obj, "battle_attack_won")
-
-    def get_badge_battle_training_won(self, obj: Update) -> int:
-        return getattr(obj, "battle_training_won")
-
-    def get_badge_small_rattata(self, obj: Update) -> int:
-        return getattr(obj, "small_rattata")
-
-    def get_badge_pikachu(self, obj: Update) -> int:
-        return getattr(obj, "pikachu")
-
-    def get_badge_unown(self, obj: Update) -> int:
-        return getattr(obj, "unown")
+        list_serializer_class = UpdateListSerializer
 
-    def get_badge_raid_battle_won(self, obj: Update) -> int:
-        return getattr(obj, "raid_battle_won")
 
-    def get_badge_legendary_battle_won(self, obj: Update) -> int:
-        return getattr(obj, "legendary_battle_won")
+class DetailedUpdateSerializer(serializers.BaseSerializer):
+    # Update has no data source, it was never filled in
+    encoder = UpdateEncoder(
+        [
+            (v1_name, name)
+            for name, v1_name in v1_field_names["update"].items()
+            if name != "data_source"
+        ]
+    )
 
-    def get_badge_berries_fed(self, obj: Update) -> int:
-        return getattr(obj, "berries_fed")
+    def to_representation(self, instance: Update) -> Dict[str, Any]:
+        return self.encoder.encode_instance(instance)
 
-    def get_badge_hours_defended(self, obj: Update) -> int:
-        return getattr(obj, "hours_defended")
-
-    def get_badge_challenge_quests(self, obj: Update) -> int:
-        return getattr(obj, "challenge_quests")
-
-    def get_badge_max_level_friends(self, obj: Update) -> int:
-        return getattr(obj, "max_level_friends")
-
-    def get_badge_trading(self, obj: Update) -> int:
-        return getattr(obj, "trading")
-
-    def get_badge_trading_distance(self, obj: Update) -> int:
-        return getattr(obj, "trading_distance")
-
-    def get_badge_great_league(self, obj: Update) -> int:
-        return getattr(obj, "great_league")
-
-    def get_badge_ultra_league(self, obj: Update) -> int:
-        return getattr(obj, "ultra_league")
-
-    def get_badge_master_league(self, obj: Update) -> int:
-        return getattr(obj, "master_league")
-
-    def get_badge_photobomb(self, obj: Update) -> int:
-        return getattr(obj, "photobomb")
-
-    def get_badge_pokemon_purified(self, obj: Update) -> int:
-        return getattr(obj, "pokemon_purified")
-
-    def get_badge_rocket_grunts_defeated(self, obj: Update) -> int:
-        return getattr(obj, "rocket_grunts_defeated")
-
-    def get_badge_buddy_best(self, obj: Update) -> int:
-        return getattr(obj, "buddy_best")
-
-    def get_badge_wayfarer(self, obj: Update) -> int:
-        return getattr(obj, "wayfarer")
-
-    def get_badge_type_normal(self, obj: Update) -> int:
-        return getattr(obj, "type_normal")
-
-    def get_badge_type_fighting(self, obj: Update) -> int:
-        return getattr(obj, "type_fighting")
-
-    def get_badge_type_flying(self, obj: Update) -> int:
-        return getattr(obj, "type_flying")
-
-    def get_badge_type_poison(self, obj: Update) -> int:
-        return getattr(obj, "type_poison")
-
-    def get_badge_type_ground(self, obj: Update) -> int:
-        return getattr(obj, "type_ground")
-
-    def get_badge_type_rock(self, obj: Update) -> int:
-        return getattr(obj, "type_rock")
-
-    def get_badge_type_bug(self, obj: Update) -> int:
-        return getattr(obj, "type_bug")
-
-    def get_badge_type_ghost(self, obj: Update) -> int:
-        return getattr(obj, "type_ghost")
-
-    def get_badge_type_steel(self, obj: Update) -> int:
-        return getattr(obj, "type_steel")
-
-    def get_badge_type_fire(self, obj: Update) -> int:
-        return getattr(obj, "type_fire")
-
-    def get_badge_type_water(self, obj: Update) -> int:
-        return getattr(obj, "type_water")
-
-    def get_badge_type_grass(self, obj: Update) -> int:
-        return getattr(obj, "type_grass")
-
-    def get_badge_type_electric(self, obj: Update) -> int:
-        return getattr(obj, "type_electric")
-
-    def get_badge_type_psychic(self, obj: Update) -> int:
-        return getattr(obj, "type_psychic")
-
-    def get_badge_type_ice(self, obj: Update) -> int:
-        return getattr(obj, "type_ice")
-
-    def get_badge_type_dragon(self, obj: Update) -> int:
-        return getattr(obj, "type_dragon")
+    class Meta:
+        list_serializer_class = UpdateListSerializer
 
-    def get_badge_type_dark(self, obj: Update) -> int:
-        return getattr(obj, "type_dark")
 
-    def get_badge_type_fairy(self, obj: Update) -> int:
-        return getattr(obj, "type_fairy")
+def get_friend_code_sharers(trainers: Iterable[Trainer]) -> Set[int]:
+    """The primary keys of those trainers who share their friend code to the API"""
+    return set(
+        Trainer.objects.filter(pk__in=[trainer.pk for trainer in trainers])
+        .sharing_friend_code("api")
+        .values_list("pk", flat=True)
+    )
 
-    def get_gymbadges_total(self, obj: Update) -> int:
-        return getattr(obj, "gymbadges_total")
 
-    def get_gymbadges_gold(self, obj: Update) -> int:
-        return getattr(obj, "gymbadges_gold")
+def get_update_sets(trainers: Iterable[Trainer], limit: int) -> Dict[int, List[Update]]:
+    """The latest `limit` updates of each trainer, by their primary key"""
+    trainers = {trainer.pk: trainer for trainer in trainers}
+    update_sets = {pk: [] for pk in trainers}
+    updates = Update.objects.latest_of_each(trainers, limit).only(
+        *BriefUpdateSerializer.encoder.fields
+    )
+    for update in updates:
+        # The updates are encoded with their trainer's `tid`, which is already at hand
+        update.trainer = trainers[update.trainer_id]
+        update_sets[update.trainer_id].append(update)
+    return update_sets
 
-    def get_pokemon_info_stardust(self, obj: Update) -> int:
-        return getattr(obj, "stardust")
 
-    class Meta:
-        model = Update
-        fields = tuple(v1_field_names["update"].values())
+class TrainerListSerializer(serializers.ListSerializer):
+    def to_representation(self, data) -> List[Dict[str, Any]]:
+        """Looks up friend code sharing and the latest updates for the whole page at once"""
+        trainers = list(data.all() if isinstance(data, Manager) else data)
+        self.child.friend_code_sharers = get_friend_code_sharers(trainers)
+        self.child.update_sets = get_update_sets(trainers, self.child.update_set_limit)
+        return super().to_representation(trainers)
 
 
 class TrainerSerializer(serializers.ModelSerializer):
@@ -385,8 +258,15 @@ class TrainerSerializer(serializers.ModelSerializer):
     def get_username(self, obj: Trainer) -> str:
         return getattr(obj, "codename")
 
+    # Set by `TrainerListSerializer` for the whole page, looked up per trainer otherwise
+    friend_code_sharers = None
+    update_sets = None
+
     def get_friend_code(self, obj: Trainer) -> str:
-        if obj.has_perm("trainerdex.share_friend_code_to_api"):
+        sharers = self.friend_code_sharers
+        if sharers is None:
+            sharers = self.friend_code_sharers = get_friend_code_sharers([obj])
+        if obj.pk in sharers:
             if hasattr(obj, "friend_code"):
                 return obj.friend_code.code
         return None
@@ -415,8 +295,16 @@ class TrainerSerializer(serializers.ModelSerializer):
     def get_leaderboard_region(self, obj: Trainer) -> None:
         return None
 
+    @property
+    def update_set_limit(self) -> int:
+        """How many of each trainer's latest updates are in `update_set`, set by the view"""
+        return self.context.get("update_set_limit", 100)
+
     def get_update_set(self, obj: Trainer) -> Dict[str, Union[str, int]]:
-        return BriefUpdateSerializer(obj.updates, read_only=True, many=True).data
+        update_sets = self.update_sets
+        if update_sets is None or obj.pk not in update_sets:
+            update_sets = self.update_sets = get_update_sets([obj], self.update_set_limit)
+        return BriefUpdateSerializer(update_sets[obj.pk], read_only=True, many=True).data
 
     def get_prefered(self, obj: Trainer) -> bool:
         """This field is deprecated and will be removed in API v2"""
@@ -444,6 +332,7 @@ class TrainerSerializer(serializers.ModelSerializer):
             "update_set",
             "prefered",
         )
+        list_serializer_class = TrainerListSerializer
 
 
 class UserSerializer(serializers.ModelSerializer):
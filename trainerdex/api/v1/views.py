@@ -1,19 +1,26 @@
 import logging
+from typing import Any, Dict, List
 
 from allauth.socialaccount.models import SocialAccount
+from django.db.models import QuerySet
 from django.http import Http404
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework.serializers import SerializerMetaclass
+from rest_framework.settings import api_settings
 from rest_framework import status
 
+from trainerdex.api.conditional import ConditionalGetMixin
+from trainerdex.api.export import Export
+from trainerdex.api.offload import OffloadedReadsMixin
 from trainerdex.api.v1.serializers import (
     BriefUpdateSerializer,
     DetailedUpdateSerializer,
     SocialAllAuthSerializer,
     TrainerSerializer,
     UserSerializer,
+    v1_field_names,
 )
 from trainerdex.models import Trainer, Update
 from trainerdex.models import TrainerQuerySet
@@ -26,8 +33,11 @@ class UserViewSet(ReadOnlyModelViewSet):
     queryset = Trainer.objects.default_excludes().exclude(tid__isnull=True)
 
 
-class TrainerViewSet(ReadOnlyModelViewSet):
+class TrainerViewSet(OffloadedReadsMixin, ConditionalGetMixin, ReadOnlyModelViewSet):
     serializer_class = TrainerSerializer
+    update_set_limit = 100
+    update_set_limit_query_param = "update_set_limit"
+    offloaded_actions = ["retrieve"]
 
     def get_queryset(self) -> TrainerQuerySet:
         """
@@ -43,11 +53,41 @@ class TrainerViewSet(ReadOnlyModelViewSet):
             queryset = queryset.filter(codename__codename=codename)
         if faction:
             queryset = queryset.filter(faction__pk=faction)
-        return queryset
+        return queryset.select_related("friend_code")
 
+    def get_serializer_context(self) -> Dict[str, Any]:
+        return {
+            **super().get_serializer_context(),
+            "update_set_limit": self.get_update_set_limit(),
+        }
 
-class UpdateViewSet(ReadOnlyModelViewSet):
+    def get_freshness_querysets(self) -> List[QuerySet]:
+        trainers = self.get_freshness_queryset()
+        return [trainers, Update.objects.filter(trainer__in=trainers)]
+
+    def get_update_set_limit(self) -> int:
+        """How many of each trainer's latest updates are in `update_set`
+
+        Legacy clients that need more of them can ask with `?update_set_limit=`.
+        """
+        try:
+            limit = int(self.request.query_params[self.update_set_limit_query_param])
+        except (KeyError, ValueError):
+            return self.update_set_limit
+        return limit if limit > 0 else self.update_set_limit
+
+
+class UpdateViewSet(OffloadedReadsMixin, ConditionalGetMixin, ReadOnlyModelViewSet):
     queryset = Update.objects.default_excludes()
+    offloaded_actions = ["list"]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + Export.renderer_classes
+    export = Export(
+        [
+            (v1_name, "trainer__tid" if name == "trainer" else name)
+            for name, v1_name in v1_field_names["update"].items()
+            if name != "data_source"
+        ]
+    )
 
     def get_serializer_class(self) -> SerializerMetaclass:
         if self.action == "list" or not self.request.query_params.get("detail", True):
@@ -73,8 +113,16 @@ class UpdateViewSet(ReadOnlyModelViewSet):
 
         return obj
 
+    def get_freshness_querysets(self) -> List[QuerySet]:
+        return [self.queryset.filter(trainer__tid=self.kwargs["pk"])]
+
     def list(self, request, pk: int) -> Response:
+        return self.conditional(request, self.list_updates, pk)
+
+    def list_updates(self, request, pk: int) -> Response:
         queryset = self.queryset.filter(trainer=self.get_trainer(pk))
+        if request.accepted_renderer.format in self.export.formats:
+            return self.export.response(request, queryset, filename=f"updates-{pk}")
         serializer = self.get_serializer_class()(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_206_PARTIAL_CONTENT)
 
@@ -85,6 +133,9 @@ class UpdateViewSet(ReadOnlyModelViewSet):
 
     @action(detail=True, methods=["get"])
     def latest(self, request, pk: int) -> Response:
+        return self.conditional(request, self.latest_update, pk)
+
+    def latest_update(self, request, pk: int) -> Response:
         try:
             obj = self.queryset.filter(trainer=self.get_trainer(pk)).latest("update_time")
         except Update.DoesNotExist:
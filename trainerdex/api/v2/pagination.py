@@ -0,0 +1,151 @@
+import base64
+import json
+from collections import OrderedDict
+from decimal import Decimal
+from distutils.util import strtobool
+from typing import List, Optional, Tuple
+
+from django.db.models import Model
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from trainerdex.leaderboard import Key, Leaderboard
+
+
+class LeaderboardPagination(LimitOffsetPagination):
+    """Pagination for `Leaderboard`, rather than a queryset
+
+    By default this is limit/offset pagination, which can be centred on a trainer.
+    Passing `cursor`, empty for the first page, pages by keyset instead.
+    Pages then hold steady while new updates arrive and deep pages cost no more than the first.
+    Passing `count=false` skips counting the whole leaderboard in either mode.
+    """
+
+    focus_query_param = "focus"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self) -> None:
+        self.focus_offset = None
+        self.cursor_mode = False
+        self.has_next = False
+        self.has_previous = False
+        self.next_key = None
+        self.previous_key = None
+
+    def paginate_queryset(
+        self, leaderboard: Leaderboard, request, view=None
+    ) -> Optional[List[Model]]:
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        if self.get_count(request):
+            self.count = leaderboard.count()
+        else:
+            self.count = None
+
+        if self.focus_offset is None and self.cursor_query_param in request.query_params:
+            return self.paginate_by_cursor(leaderboard, request)
+
+        self.offset = self.get_offset(request)
+        if self.count is not None and self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        # One row past the page tells us if there's another, without needing the count
+        rows = leaderboard.page(self.offset, self.limit + 1)
+        self.has_next = len(rows) > self.limit
+        return rows[: self.limit]
+
+    def get_offset(self, request) -> int:
+        if self.focus_offset is not None:
+            return self.focus_offset
+        return super().get_offset(request)
+
+    def get_count(self, request) -> bool:
+        """Whether to count the leaderboard, which is the default unless `count` is falsy"""
+        try:
+            return bool(strtobool(request.query_params.get(self.count_query_param, "true")))
+        except ValueError:
+            return True
+
+    def paginate_by_cursor(self, leaderboard: Leaderboard, request) -> List[Model]:
+        self.cursor_mode = True
+        key, reverse = self.decode_cursor(request)
+
+        rows = leaderboard.seek(key, limit=self.limit + 1, reverse=reverse)
+        more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, more
+        else:
+            self.has_next, self.has_previous = more, key is not None
+
+        if rows:
+            self.previous_key = leaderboard.key(rows[0])
+            self.next_key = leaderboard.key(rows[-1])
+        else:
+            self.has_next = self.has_previous = False
+        return rows
+
+    def get_paginated_response(self, data) -> Response:
+        fields = [("count", self.count)] if self.count is not None else []
+        return Response(
+            OrderedDict(
+                fields
+                + [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        if self.cursor_mode:
+            return self.encode_cursor(self.next_key, reverse=False)
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        url = replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+        return remove_query_param(url, self.focus_query_param)
+
+    def get_previous_link(self) -> Optional[str]:
+        if self.cursor_mode:
+            if not self.has_previous:
+                return None
+            return self.encode_cursor(self.previous_key, reverse=True)
+
+        url = super().get_previous_link()
+        return url and remove_query_param(url, self.focus_query_param)
+
+    def encode_cursor(self, key: Key, reverse: bool) -> str:
+        value, datetime, trainer = key
+        position = [str(value), datetime.isoformat(), trainer, int(reverse)]
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode("ascii")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        url = remove_query_param(url, self.focus_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request) -> Tuple[Optional[Key], bool]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            value, datetime, trainer, reverse = json.loads(base64.urlsafe_b64decode(encoded))
+            key = (Decimal(value), parse_datetime(datetime), int(trainer))
+        except (TypeError, ValueError, ArithmeticError):
+            raise NotFound(self.invalid_cursor_message)
+        if key[1] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return key, bool(reverse)
@@ -1,9 +1,20 @@
-from typing import Iterable
+from functools import lru_cache
+from typing import Dict, Iterable, List
 
 from rest_framework import serializers
 
 from trainerdex.fields import PogoDecimalField, PogoPositiveIntegerField
-from trainerdex.models import Faction, Codename, Trainer, FriendCode, Update
+from trainerdex.leaderboard import Leaderboard, Row
+from trainerdex.models import (
+    Codename,
+    Evidence,
+    EvidenceImage,
+    Faction,
+    FriendCode,
+    Trainer,
+    TrainerStats,
+    Update,
+)
 from trainerdex.models import UpdateQuerySet
 
 
@@ -20,8 +31,6 @@ class UpdateSerializerInlineFilteredListSerializer(serializers.ListSerializer):
 
 
 class UpdateSerializerInline(serializers.ModelSerializer):
-    data_source = serializers.SlugRelatedField(many=False, read_only=True, slug_field="slug")
-
     class Meta:
         model = Update
         list_serializer_class = UpdateSerializerInlineFilteredListSerializer
@@ -73,8 +82,6 @@ class TrainerSerializer(serializers.ModelSerializer):
 
 
 class UpdateSerializer(serializers.ModelSerializer):
-    data_source = serializers.SlugRelatedField(many=False, read_only=True, slug_field="slug")
-
     class Meta:
         model = Update
         fields = ["uuid", "trainer", "update_time", "submission_date", "comment", "metadata"] + [
@@ -84,6 +91,26 @@ class UpdateSerializer(serializers.ModelSerializer):
         ]
 
 
+class UpdateBulkSerializer(UpdateSerializer):
+    """An item of a bulk upload, see `UpdateViewSet.bulk`
+
+    Trainers are looked up once for the whole upload and passed in as `context["trainers"]`.
+    """
+
+    trainer = serializers.IntegerField()
+
+    def validate_trainer(self, value: int) -> Trainer:
+        try:
+            return self.context["trainers"][value]
+        except KeyError:
+            raise serializers.ValidationError(
+                serializers.PrimaryKeyRelatedField.default_error_messages["does_not_exist"].format(
+                    pk_value=value
+                ),
+                code="does_not_exist",
+            )
+
+
 class TrainerSerializerInline(serializers.ModelSerializer):
     country = serializers.CharField()
     faction = FactionInline(many=False, read_only=True)
@@ -98,6 +125,40 @@ class TrainerSerializerInline(serializers.ModelSerializer):
         ]
 
 
+class EvidenceImageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EvidenceImage
+        fields = ["id", "image", "width", "height"]
+
+
+class EvidenceSerializerInline(serializers.ModelSerializer):
+    images = EvidenceImageSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Evidence
+        fields = ["id", "content_field", "approval", "images"]
+
+
+class EvidenceQueueSerializer(serializers.ModelSerializer):
+    """A trainer awaiting verification, with the evidence `EvidenceQueueView` prefetched"""
+
+    country = serializers.CharField()
+    faction = FactionInline(many=False, read_only=True)
+    evidence = EvidenceSerializerInline(source="pending_evidence", many=True, read_only=True)
+
+    class Meta:
+        model = Trainer
+        fields = [
+            "id",
+            "username",
+            "faction",
+            "country",
+            "start_date",
+            "date_joined",
+            "evidence",
+        ]
+
+
 class FriendCodeSerializer(serializers.ModelSerializer):
     trainer = TrainerSerializerInline(many=False, read_only=True)
 
@@ -106,39 +167,117 @@ class FriendCodeSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class TrainerStatsSerializerInline(serializers.ModelSerializer):
+    class Meta:
+        model = TrainerStats
+        fields = [field.name for field in TrainerStats.stat_fields]
+
+
+class TargetProgressSerializer(serializers.Serializer):
+    """Serializes a `trainerdex.progress.Progress`"""
+
+    id = serializers.IntegerField(source="target.pk")
+    name = serializers.CharField(source="target.name")
+    stat = serializers.CharField(source="target.stat")
+    target = serializers.ReadOnlyField(source="target.target")
+    has_reached = serializers.BooleanField(source="target.has_reached")
+    date_reached = serializers.DateTimeField(source="target.date_reached")
+    value = serializers.ReadOnlyField()
+    datetime = serializers.DateTimeField(source="time")
+    percent = serializers.DecimalField(max_digits=5, decimal_places=2, coerce_to_string=False)
+    rate = serializers.DecimalField(
+        max_digits=None, decimal_places=2, coerce_to_string=False, allow_null=True
+    )
+    eta = serializers.DateTimeField()
+
+
 class LeaderboardSerializer(serializers.ModelSerializer):
+    """A row of the leaderboard, for the schema, encoded by `LeaderboardRowEncoder`"""
+
     trainer = TrainerSerializerInline(many=False, read_only=True)
     value = serializers.SerializerMethodField()
     datetime = serializers.DateTimeField()
     rank = serializers.IntegerField(max_value=0)
-    extra_fields = serializers.SerializerMethodField()
+    # Each of the trainer's stats that isn't null
+    extra_fields = serializers.DictField(read_only=True)
 
     def get_value(self, obj):
         return obj.value
 
-    def get_extra_fields(self, obj):
-        extra = UpdateSerializerInline(obj, many=False, read_only=True).data
-        return {k: v for k, v in extra.items() if v is not None}
-
     class Meta:
-        model = Update
+        model = TrainerStats
         fields = ["trainer", "value", "datetime", "rank", "extra_fields"]
 
 
 class LeaderboardSerializerLegacy(LeaderboardSerializer):
-    trainer = serializers.SerializerMethodField()
-
-    def get_trainer(self, obj):
-        return TrainerSerializerInline(obj, many=False, read_only=True).data
-
-    def get_extra_fields(self, obj):
-        extra = {
-            x.replace("extra_max__", ""): getattr(obj, x)
-            for x in dir(obj)
-            if x.startswith("extra_max__")
-        }
-        return {k: v for k, v in extra.items() if v is not None}
+    # The best of each stat that can't go down, in the order they were always returned in
+    extra_field_names = sorted(
+        field.name for field in TrainerStats.stat_fields if field.reversable is False
+    )
 
     class Meta:
-        model = Trainer
+        model = TrainerStats
         fields = ["trainer", "value", "datetime", "rank", "extra_fields"]
+
+
+class LeaderboardRowEncoder:
+    """Encodes `Leaderboard` rows exactly as `LeaderboardSerializer` would
+
+    Building a serializer for every row, and every stat on it, dominated the cost of a page.
+    The fields, their positions in `Leaderboard.columns` and their representations
+    are looked up once here, so each row is a single pass over its tuple.
+    """
+
+    def __init__(self, legacy: bool = False) -> None:
+        position = {column: i for i, column in enumerate(Leaderboard.columns)}
+        fields = LeaderboardSerializer().fields
+        self.datetime = fields["datetime"].to_representation
+        self.rank = fields["rank"].to_representation
+        if legacy:
+            # Legacy extra fields were always read straight off the row
+            self.extra_fields = [
+                (name, position[name], None)
+                for name in LeaderboardSerializerLegacy.extra_field_names
+            ]
+        else:
+            self.extra_fields = [
+                (name, position[name], field.to_representation)
+                for name, field in TrainerStatsSerializerInline().fields.items()
+            ]
+
+    def encode(self, rows: Iterable[Row]) -> List[Dict]:
+        # Faction names are translated, so they're looked up per request
+        factions = {
+            faction: {"id": faction, "name_short": Faction(id=faction).name_short}
+            for faction, _ in Faction.FACTION_CHOICES
+        }
+        data = []
+        for row in rows:
+            trainer, value, datetime, rank, codename, faction, country = row[:7]
+            extra_fields = {}
+            for name, i, to_representation in self.extra_fields:
+                extra = row[i]
+                if extra is not None:
+                    extra_fields[name] = (
+                        extra if to_representation is None else to_representation(extra)
+                    )
+            data.append(
+                {
+                    "trainer": {
+                        "id": trainer,
+                        "codename": codename,
+                        "faction": factions[faction],
+                        "country": country or "",
+                    },
+                    "value": value,
+                    "datetime": self.datetime(datetime),
+                    "rank": self.rank(rank),
+                    "extra_fields": extra_fields,
+                }
+            )
+        return data
+
+
+@lru_cache(maxsize=None)
+def get_leaderboard_encoder(legacy: bool = False) -> LeaderboardRowEncoder:
+    return LeaderboardRowEncoder(legacy=legacy)
@@ -3,6 +3,7 @@ from django.urls import path
 from rest_framework_extensions import routers
 
 from trainerdex.api.v2.views import (
+    EvidenceQueueView,
     LeaderboardView,
     NestedUpdateViewSet,
     FriendCodeViewSet,
@@ -25,6 +26,7 @@ router.register(r"updates", UpdateViewSet)
 
 urlpatterns = [
     path("leaderboard/", LeaderboardView.as_view()),
+    path("evidence/pending/", EvidenceQueueView.as_view()),
 ]
 
 urlpatterns += router.urls
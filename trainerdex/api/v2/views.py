@@ -1,41 +1,63 @@
 import logging
 import math
 from distutils.util import strtobool
+from typing import List, Optional
 
-from django.shortcuts import redirect
+from django.db.models import Prefetch, QuerySet
 from django.urls import reverse
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.decorators import action
 from rest_framework.generics import ListAPIView
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
-from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.viewsets import ModelViewSet
 
 from rest_framework_extensions.mixins import NestedViewSetMixin
 from oauth2_provider.contrib.rest_framework import OAuth2Authentication, TokenHasResourceScope
 
+from trainerdex.api.conditional import ConditionalGetMixin
+from trainerdex.api.export import Export
+from trainerdex.api.offload import OffloadedReadsMixin
 from trainerdex.api.v2.filters import (
     LeaderboardFilter,
     FriendCodeFilter,
     TrainerFilter,
     UpdateFilter,
 )
+from trainerdex.api.v2.pagination import LeaderboardPagination
+from trainerdex.api.v2.parsers import NDJSONParser
 from trainerdex.api.v2.serializers import (
     LeaderboardSerializer,
     LeaderboardSerializerLegacy,
     CodenameSerializer,
+    EvidenceQueueSerializer,
     FriendCodeSerializer,
+    TargetProgressSerializer,
     TrainerSerializer,
+    UpdateBulkSerializer,
     UpdateSerializer,
+    get_leaderboard_encoder,
 )
-from trainerdex.models import Trainer, FriendCode, Update
-from trainerdex.models import TrainerQuerySet, UpdateQuerySet
+from trainerdex.cache import LeaderboardCache
+from trainerdex.leaderboard import Leaderboard
+from trainerdex.models import (
+    Evidence,
+    FriendCode,
+    LeaderboardRank,
+    Target,
+    Trainer,
+    TrainerStats,
+    Update,
+)
+from trainerdex.models import TrainerQuerySet
+from trainerdex.progress import get_progress
 
 log = logging.getLogger("django.trainerdex")
 
 
-class TrainerViewSet(NestedViewSetMixin, ModelViewSet):
+class TrainerViewSet(OffloadedReadsMixin, ConditionalGetMixin, NestedViewSetMixin, ModelViewSet):
     """
     In the detail view, there is a field `updates`,
     this is limited to the 15 latest updates.
@@ -48,9 +70,38 @@ class TrainerViewSet(NestedViewSetMixin, ModelViewSet):
     authentication_classes = [OAuth2Authentication]
     permission_classes = [TokenHasResourceScope]
     required_scopes = ["profile"]
-    queryset = Trainer.objects.default_excludes()
+    queryset = (
+        Trainer.objects.default_excludes().select_related("faction").prefetch_related("codenames")
+    )
     serializer_class = TrainerSerializer
     filterset_class = TrainerFilter
+    offloaded_actions = ["retrieve"]
+
+    def get_freshness_querysets(self) -> List[QuerySet]:
+        trainers = self.get_freshness_queryset()
+        if self.action == "retrieve":
+            return [trainers, Update.objects.filter(trainer__in=trainers)]
+        elif self.action == "targets":
+            return [
+                trainers,
+                Update.objects.filter(trainer__in=trainers),
+                Target.objects.filter(trainer__in=trainers),
+            ]
+        return [trainers]
+
+    @action(detail=True, methods=["get"])
+    def targets(self, request, pk=None):
+        """Each of the trainer's targets, how far through it they are and when they'll reach it
+
+        `eta` is projected from how fast the stat has grown over the 30 days up to the trainer's
+        latest update. Responses have an `ETag`, and don't change until the trainer's updates
+        or targets do.
+        """
+        return self.conditional(request, self.list_targets, pk=pk)
+
+    def list_targets(self, request, pk=None):
+        progress = get_progress(self.get_object())
+        return Response(TargetProgressSerializer(progress, many=True).data)
 
     @action(detail=True, methods=["post"])
     def set_codename(self, request, pk=None):
@@ -70,17 +121,91 @@ class TrainerViewSet(NestedViewSetMixin, ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UpdateViewSet(ModelViewSet):
+class UpdateViewSet(OffloadedReadsMixin, ConditionalGetMixin, ModelViewSet):
     authentication_classes = [OAuth2Authentication]
     permission_classes = [TokenHasResourceScope]
     required_scopes = ["update"]
     queryset = Update.objects.default_excludes()
     serializer_class = UpdateSerializer
     filterset_class = UpdateFilter
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + Export.renderer_classes
+    export = Export([(name, name) for name in UpdateSerializer.Meta.fields])
+    bulk_max_items = 10000
+    offloaded_actions = ["list"]
+
+    def list(self, request, *args, **kwargs):
+        """Also streams every update with `?format=ndjson` or `?format=csv`, unpaginated"""
+        if request.accepted_renderer.format in self.export.formats:
+            return self.conditional(request, self.stream, *args, **kwargs)
+        return super().list(request, *args, **kwargs)
+
+    def stream(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.export.response(request, queryset, filename="updates")
+
+    @action(detail=False, methods=["post"], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request, *args, **kwargs):
+        """Creates many updates at once, from a JSON array or newline delimited JSON
+
+        Each update is validated on its own, so some can be created while others are rejected.
+        The response has a result for each, in the order they were sent, with the `uuid` of
+        those created and the `errors` of those that weren't. The status is 201 if they were
+        all created, 207 if only some were and 400 if none were.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            items = [items]
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {"detail": f"Send at most {self.bulk_max_items} updates at once"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        ids = set()
+        for item in items:
+            try:
+                ids.add(int(item["trainer"]))
+            except (KeyError, TypeError, ValueError):
+                pass  # Left for the serializer to report
+        context = self.get_serializer_context()
+        context["trainers"] = Trainer.objects.in_bulk(ids)
+
+        results = [None] * len(items)
+        updates = []
+        for i, item in enumerate(items):
+            serializer = UpdateBulkSerializer(data=item, context=context)
+            if serializer.is_valid():
+                updates.append((i, Update(**serializer.validated_data)))
+            else:
+                results[i] = {"index": i, "status": "invalid", "errors": serializer.errors}
+
+        errors = Update.objects.ingest([update for _, update in updates])
+        for (i, update), error in zip(updates, errors):
+            if error is None:
+                results[i] = {"index": i, "status": "created", "uuid": update.uuid}
+            else:
+                results[i] = {
+                    "index": i,
+                    "status": "invalid",
+                    "errors": serializers.as_serializer_error(error),
+                }
+
+        created = sum(result["status"] == "created" for result in results)
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {"created": created, "failed": len(results) - created, "results": results},
+            status=code,
+        )
 
 
 class NestedUpdateViewSet(NestedViewSetMixin, UpdateViewSet):
-    pass
+    # Updates in bulk can be of any trainer, so are only created through `/updates/bulk/`
+    bulk = None
 
 
 class FriendCodeViewSet(ModelViewSet):
@@ -89,11 +214,38 @@ class FriendCodeViewSet(ModelViewSet):
     filterset_class = FriendCodeFilter
 
 
-class LeaderboardView(ListAPIView):
+class EvidenceQueueView(ListAPIView):
+    """Unverified trainers whose evidence is waiting to be reviewed, longest waiting first
+
+    A page costs the same few queries however long it is, evidence and its images are
+    prefetched for the whole page.
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = EvidenceQueueSerializer
+
+    def get_queryset(self) -> TrainerQuerySet:
+        evidence = (
+            Evidence.objects.pending()
+            .filter(content_field="trainer.profile")
+            .prefetch_related("images")
+        )
+        return (
+            Trainer.objects.awaiting_verification()
+            .select_related("faction")
+            .prefetch_related(Prefetch("evidence", queryset=evidence, to_attr="pending_evidence"))
+            .order_by("date_joined", "pk")
+        )
+
+
+class LeaderboardView(OffloadedReadsMixin, ListAPIView):
     """View the leaderboard, init"""
 
     queryset = Trainer.objects.default_excludes()
     filterset_class = LeaderboardFilter
+    pagination_class = LeaderboardPagination
+    # What it can be sorted by, with `o`
+    stats = {field.name for field in TrainerStats.stat_fields}
 
     @property
     def get_serializer(self):
@@ -101,11 +253,56 @@ class LeaderboardView(ListAPIView):
             return LeaderboardSerializerLegacy
         return LeaderboardSerializer
 
+    def get_board(self) -> Optional[str]:
+        """The precomputed board holding the filtered trainers, if there is one"""
+        filters = {
+            key: value
+            for key, value in self.request.query_params.items()
+            if key in self.filterset_class.base_filters and value
+        }
+        if not filters:
+            return LeaderboardRank.get_board()
+        elif filters.keys() == {"faction"}:
+            return LeaderboardRank.get_board(faction=filters["faction"])
+        elif filters.keys() == {"country"}:
+            return LeaderboardRank.get_board(country=filters["country"])
+        return None
+
+    def get_community(self) -> Optional[str]:
+        """The primary key of the community the trainers are filtered by, if it's the only filter"""
+        filters = {
+            key: self.request.query_params.getlist(key)
+            for key in self.request.query_params
+            if key in self.filterset_class.base_filters and self.request.query_params.get(key)
+        }
+        if filters.keys() == {"communities"} and len(filters["communities"]) == 1:
+            return filters["communities"][0]
+        return None
+
+    def get_cache(self) -> LeaderboardCache:
+        return LeaderboardCache(
+            {
+                key: self.request.query_params.getlist(key)
+                for key in self.filterset_class.base_filters
+            }
+        )
+
     def list(self, request, *args, **kwargs):
+        order_by = self.request.query_params.get("o", "total_xp")
+        if order_by not in self.stats:
+            return Response(
+                {"status": f"Unable to sort the leaderboard by {order_by}, it isn't a stat"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         queryset = self.filter_queryset(self.get_queryset())
-        leaderboard = queryset.get_leaderboard(
+        board = Leaderboard(
             legacy_mode=strtobool(self.request.query_params.get("legacy", "0")),
-            order_by=self.request.query_params.get("o", "total_xp"),
+            order_by=order_by,
+            queryset=queryset,
+            board=self.get_board(),
+            cache=self.get_cache(),
+            community=self.get_community(),
         )
 
         focus = self.request.query_params.get("focus", "")
@@ -118,46 +315,28 @@ class LeaderboardView(ListAPIView):
                     status=status.HTTP_404_NOT_FOUND,
                 )
 
-            TRAINER_NOT_IN_SET = Response(
-                {
-                    "status": f"Trainer with id {focus} ({trnr_focus}) is not in this leaderboard.",
-                    "profile-url": request.build_absolute_uri(
-                        reverse("v2:trainer-detail", args=[trnr_focus.pk])
-                    ),
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-            if isinstance(leaderboard, TrainerQuerySet):
-                if not leaderboard.filter(pk=trnr_focus.pk).exists():
-                    return TRAINER_NOT_IN_SET
-            elif isinstance(leaderboard, UpdateQuerySet):
-                if not leaderboard.filter(trainer=trnr_focus).exists():
-                    return TRAINER_NOT_IN_SET
-
-            for index, item in enumerate(leaderboard):
-                if isinstance(item, Trainer):
-                    pk = item.id
-                elif isinstance(item, Update):
-                    pk = item.trainer.id
-                if pk == int(focus):
-                    url = self.request.build_absolute_uri()
-                    url = remove_query_param(url, "focus")
-                    limit = max(
-                        0,
-                        int(self.request.query_params.get("limit", api_settings.PAGE_SIZE)),
-                    )
-                    url = replace_query_param(url, "limit", limit)
-                    offset = max(0, index + 1 - math.ceil(limit / 2))
-                    url = replace_query_param(url, "offset", offset)
-                    return redirect(url)
-
-        page = self.paginate_queryset(leaderboard)
+            position = board.locate(trnr_focus.pk)
+            if position is None:
+                return Response(
+                    {
+                        "status": f"Trainer with id {focus} ({trnr_focus}) is not in this leaderboard.",
+                        "profile-url": request.build_absolute_uri(
+                            reverse("v2:trainer-detail", args=[trnr_focus.pk])
+                        ),
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            # Centre the page on the trainer
+            limit = self.paginator.get_limit(request)
+            self.paginator.focus_offset = max(0, position + 1 - math.ceil(limit / 2))
+
+        encoder = get_leaderboard_encoder(legacy=board.legacy)
+        page = self.paginate_queryset(board)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(encoder.encode(page))
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(encoder.encode(board.objects.values_list(*board.columns)))
 
     def get(self, request):
         return self.list(request)
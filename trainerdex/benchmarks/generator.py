@@ -0,0 +1,136 @@
+"""Deterministic trainers and updates to benchmark leaderboards against
+
+The same `seed` and sizes always produce the same data, so runs on different commits compare.
+Writes go straight to the database with `bulk_create`, so signals don't fire.
+The stats snapshot and rank store are rebuilt afterwards, as they would be by the commands.
+"""
+
+import datetime
+import random
+from decimal import Decimal
+from typing import Dict, List, Union
+
+from django.db import connection, transaction
+
+from trainerdex.models import Faction, LeaderboardRank, Trainer, TrainerStats, Update
+
+COUNTRIES = ["GB", "US", "DE", "JP", "BR", "AU", "FR", "CA", "NL", None]
+FIRST_UPDATE = datetime.datetime(2016, 7, 6, tzinfo=datetime.timezone.utc)
+LAST_UPDATE = datetime.datetime(2020, 12, 31, tzinfo=datetime.timezone.utc)
+MAX_VALUE = 2**31 - 1
+
+
+def reset() -> None:
+    """Empties every table holding trainers or their updates"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "TRUNCATE {} CASCADE".format(connection.ops.quote_name(Trainer._meta.db_table))
+        )
+
+
+def generate(trainers: int, updates: int, seed: int = 0, batch_size: int = 1000) -> Dict[str, int]:
+    """Replaces all trainers with `trainers` new ones, each with `updates` updates
+
+    About 5% of trainers are unverified and 2% banned, so some of every board is excluded.
+    Stats grow at a steady per-trainer rate with some noise and never go down,
+    except those that are reversable, which wander.
+
+    Returns
+    -------
+    The number of rows written to each table
+    """
+    rng = random.Random(seed)
+    factions = [faction for faction, _ in Faction.FACTION_CHOICES]
+    stats = TrainerStats.stat_fields
+
+    with transaction.atomic():
+        reset()
+        # Usually loaded from the factions fixture, which a fresh test database won't have
+        Faction.objects.bulk_create(
+            [Faction(id=faction) for faction in factions], ignore_conflicts=True
+        )
+        batch = []
+        for n in range(trainers):
+            banned = rng.random() < 0.02
+            batch.append(
+                Trainer(
+                    username=f"Bench{n}",
+                    password="!",
+                    faction_id=rng.choice(factions),
+                    country=rng.choice(COUNTRIES),
+                    start_date=(
+                        FIRST_UPDATE + datetime.timedelta(days=rng.randint(0, 365))
+                    ).date(),
+                    is_verified=rng.random() > 0.05,
+                    is_banned=banned,
+                    is_active=not banned,
+                )
+            )
+        Trainer.objects.bulk_create(batch, batch_size=batch_size)
+
+        batch = []
+        for trainer, start_date in Trainer.objects.order_by("pk").values_list("pk", "start_date"):
+            rates = {field.name: daily_rate(rng, field) for field in stats}
+            values = {field.name: 0 for field in stats}
+            start = datetime.datetime.combine(start_date, datetime.time(), datetime.timezone.utc)
+            span = (LAST_UPDATE - start).total_seconds()
+            times = sorted(
+                start + datetime.timedelta(seconds=rng.uniform(0, span)) for _ in range(updates)
+            )
+            previous = start
+            for update_time in times:
+                days = (update_time - previous).total_seconds() / 86400
+                previous = update_time
+                batch.append(
+                    Update(
+                        trainer_id=trainer,
+                        update_time=update_time,
+                        **grow(rng, stats, values, rates, days),
+                    )
+                )
+                if len(batch) >= batch_size:
+                    Update.objects.bulk_create(batch)
+                    batch = []
+        Update.objects.bulk_create(batch)
+
+        return {
+            "trainers": trainers,
+            "updates": trainers * updates,
+            "stats": TrainerStats.objects.rebuild(),
+            "ranks": LeaderboardRank.objects.rebuild(),
+        }
+
+
+def daily_rate(rng: random.Random, field) -> float:
+    if field.name == "total_xp":
+        return rng.uniform(2_000, 60_000)
+    return rng.lognormvariate(0.5, 1.2)
+
+
+def grow(
+    rng: random.Random,
+    stats: List,
+    values: Dict[str, float],
+    rates: Dict[str, float],
+    days: float,
+) -> Dict[str, Union[int, Decimal]]:
+    """Advances every stat by `days`, returning those the update reports
+
+    An update always has total XP and each other stat a little under half the time,
+    as most are submitted from a single screenshot.
+    """
+    reported = {}
+    for field in stats:
+        if field.reversable:
+            values[field.name] = max(
+                0, values[field.name] + rng.gauss(0, rates[field.name] * days)
+            )
+        else:
+            values[field.name] += rates[field.name] * days * rng.uniform(0.5, 1.5)
+        if field.name == "total_xp" or rng.random() < 0.4:
+            value = min(values[field.name], MAX_VALUE)
+            if field.get_internal_type() == "DecimalField":
+                reported[field.name] = Decimal(value).quantize(Decimal("0.01"))
+            else:
+                reported[field.name] = int(value)
+    return reported
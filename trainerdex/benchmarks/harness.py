@@ -0,0 +1,146 @@
+"""Times each leaderboard mode against whatever is in the database
+
+Every case is split in two. Fetching is everything up to having the rows or response, and its
+SQL time is measured on the connection, the rest counted as Python. Serializing is turning them
+into JSON. Peak memory is measured on a separate run, as tracing slows everything down.
+"""
+
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from trainerdex.api.v2.serializers import get_leaderboard_encoder
+from trainerdex.api.v2.views import LeaderboardView
+from trainerdex.instrumentation import timed_queries
+from trainerdex.leaderboard import Leaderboard
+from trainerdex.models import LeaderboardRank, Trainer, TrainerStats
+
+# A case returns something to serialize, and how to serialize it
+Case = Callable[[], Tuple[Any, Callable[[Any], Any]]]
+
+
+class Result(NamedTuple):
+    size: str
+    case: str
+    queries: int
+    sql_ms: float
+    python_ms: float
+    serialize_ms: float
+    peak_kib: float
+
+
+def run_case(size: str, name: str, case: Case, repeat: int = 3) -> Result:
+    """The median of `repeat` runs of `case`, with the peak memory of one more"""
+    runs = []
+    for _ in range(repeat):
+        cache.clear()
+        with timed_queries() as timer:
+            start = time.perf_counter()
+            data, serialize = case()
+            fetched = time.perf_counter()
+        serialize(data)
+        serialized = time.perf_counter()
+        runs.append(
+            (timer.queries, timer.seconds, fetched - start - timer.seconds, serialized - fetched)
+        )
+
+    cache.clear()
+    tracemalloc.start()
+    try:
+        data, serialize = case()
+        serialize(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    queries, sql, python, serializing = (statistics.median(column) for column in zip(*runs))
+    return Result(
+        size=size,
+        case=name,
+        queries=int(queries),
+        sql_ms=sql * 1000,
+        python_ms=python * 1000,
+        serialize_ms=serializing * 1000,
+        peak_kib=peak / 1024,
+    )
+
+
+def get_cases(limit: int = 100) -> Dict[str, Case]:
+    """Every leaderboard mode, read as the API would read it"""
+    renderer = JSONRenderer()
+    everyone = Trainer.objects.all()
+    # Filtering by several countries has no precomputed board, so it's ranked on the fly
+    countries = Trainer.objects.filter(country__in=["GB", "US", "DE"])
+    factions = list(Trainer.objects.order_by().values_list("faction", flat=True).distinct())
+    # Someone most of the way down the board, to find or page to
+    deep = TrainerStats.objects.default_excludes().exclude(total_xp__isnull=True).count() * 9 // 10
+    focus = (
+        LeaderboardRank.objects.filter(stat="total_xp", board=LeaderboardRank.get_board())
+        .order_by("rank", "trainer")
+        .values_list("trainer", flat=True)[deep : deep + 1]
+        .first()
+    )
+
+    def page(leaderboard: Leaderboard, offset: int = 0) -> Case:
+        def case():
+            leaderboard.count()
+            rows = leaderboard.page(offset, limit)
+            encoder = get_leaderboard_encoder(legacy=leaderboard.legacy)
+            return rows, lambda rows: renderer.render(encoder.encode(rows))
+
+        return case
+
+    def seek(leaderboard: Leaderboard, offset: int) -> Case:
+        # The key is what the previous page's cursor would hold, found outside the timings
+        key = leaderboard.key(leaderboard.page(offset - 1, 1)[0]) if offset else None
+
+        def case():
+            rows = leaderboard.seek(key, limit=limit)
+            encoder = get_leaderboard_encoder(legacy=leaderboard.legacy)
+            return rows, lambda rows: renderer.render(encoder.encode(rows))
+
+        return case
+
+    def locate(leaderboard: Leaderboard) -> Case:
+        def case():
+            return leaderboard.locate(focus), lambda position: position
+
+        return case
+
+    def view(query: str) -> Case:
+        factory = APIRequestFactory()
+        endpoint = LeaderboardView.as_view()
+
+        def case():
+            return endpoint(factory.get(f"/api/v2/leaderboard/?{query}")), lambda r: r.render()
+
+        return case
+
+    ranked = Leaderboard(queryset=everyone, board=LeaderboardRank.get_board())
+    window = Leaderboard(queryset=countries)
+    legacy = Leaderboard(legacy_mode=True, queryset=everyone)
+    cases = {
+        "ranked page": page(ranked),
+        "ranked deep offset": page(ranked, deep),
+        "ranked deep cursor": seek(ranked, deep),
+        "ranked locate": locate(ranked),
+        "window page": page(window),
+        "window deep cursor": seek(window, min(deep, max(window.count() - 1, 0))),
+        "window locate": locate(window),
+        "legacy page": page(legacy),
+        "legacy locate": locate(legacy),
+        "view": view(f"limit={limit}"),
+        "view faction": view(f"limit={limit}&faction={factions[0]}"),
+        "view focus": view(f"limit={limit}&focus={focus}"),
+        "view legacy": view(f"limit={limit}&legacy=1"),
+    }
+    return cases
+
+
+def run(size: str, repeat: int = 3, limit: int = 100) -> List[Result]:
+    return [run_case(size, name, case, repeat=repeat) for name, case in get_cases(limit).items()]
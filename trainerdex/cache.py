@@ -0,0 +1,88 @@
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class LeaderboardCache:
+    """Caches reads from a leaderboard, keyed by its normalized filters
+
+    Every board depends on one or more scopes, `faction:1`, `country:GB`, `community:3` or `global`.
+    Each scope has a version in the cache, which is part of the key of every entry built on it.
+    Invalidating a scope replaces its version, so those entries are never read again and expire.
+    """
+
+    prefix = "leaderboard"
+
+    def __init__(self, filters: Dict[str, Iterable[str]] = None) -> None:
+        """
+        Parameters
+        ----------
+        filters: dict
+            The values of each `LeaderboardFilter` field applied to the board
+        """
+        normalized = {
+            name: tuple(sorted({str(value) for value in values if value}))
+            for name, values in (filters or {}).items()
+        }
+        self.filters = tuple(
+            sorted((name, values) for name, values in normalized.items() if values)
+        )
+        self.scopes = self.get_scopes(dict(self.filters))
+        self._versions = None
+
+    @staticmethod
+    def get_scopes(filters: Dict[str, Tuple[str]]) -> Set[str]:
+        """The scopes a board depends on, any of its trainers changing will invalidate one of them
+
+        A board filtered only by codename could hold anybody, so it depends on `global`.
+        """
+        scopes = {f"faction:{value}" for value in filters.get("faction", [])}
+        scopes |= {f"country:{value}" for value in filters.get("country", [])}
+        scopes |= {f"community:{value}" for value in filters.get("communities", [])}
+        return scopes or {"global"}
+
+    @classmethod
+    def get_trainer_scopes(cls, trainer) -> Set[str]:
+        """Every scope a trainer can appear on"""
+        scopes = {"global", f"faction:{trainer.faction_id}", f"country:{trainer.country}"}
+        scopes |= {f"community:{pk}" for pk in trainer.community_set.values_list("pk", flat=True)}
+        return scopes
+
+    @classmethod
+    def version_key(cls, scope: str) -> str:
+        return f"{cls.prefix}:version:{scope}"
+
+    @classmethod
+    def invalidate(cls, scopes: Iterable[str]) -> None:
+        cache.set_many({cls.version_key(scope): uuid4().hex for scope in scopes}, timeout=None)
+
+    @classmethod
+    def invalidate_trainer(cls, trainer, scopes: Iterable[str] = ()) -> None:
+        """Invalidates every board the trainer is on, and any extra `scopes` they've just left"""
+        cls.invalidate(cls.get_trainer_scopes(trainer) | set(scopes))
+
+    @property
+    def versions(self) -> List[str]:
+        """The current version of each scope, read once per instance"""
+        if self._versions is None:
+            keys = [self.version_key(scope) for scope in sorted(self.scopes)]
+            versions = cache.get_many(keys)
+            missing = {key: uuid4().hex for key in keys if key not in versions}
+            if missing:
+                cache.set_many(missing, timeout=None)
+                versions.update(missing)
+            self._versions = [versions[key] for key in keys]
+        return self._versions
+
+    def make_key(self, *parts: Any) -> str:
+        digest = hashlib.md5(repr((self.versions, self.filters, parts)).encode("utf-8"))
+        return f"{self.prefix}:{digest.hexdigest()}"
+
+    def get_or_set(self, default: Callable[[], Any], *parts: Any) -> Any:
+        """The cached value for `parts`, calling `default` to fill it if it's missing"""
+        return cache.get_or_set(
+            self.make_key(*parts), default, timeout=settings.LEADERBOARD_CACHE_TIMEOUT
+        )
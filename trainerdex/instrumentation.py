@@ -0,0 +1,219 @@
+"""Measures the queries and time spent on every request
+
+`QueryMetricsMiddleware` records, per request, how many queries were run and how long they took,
+how long the view took besides them and how long the response took to render. For a DRF view,
+building the serializer's data is part of the view and turning it into JSON is rendering.
+
+Each request is tagged with the view and action it resolved to, eg.
+`trainerdex.api.v2.views.TrainerViewSet.list`, and logged as a line of JSON.
+With `SERVER_TIMING` set, the timings are also sent in a `Server-Timing` header.
+With `QUERY_METRICS_STATEMENTS` set, the SQL of each query is kept too, which only tests need.
+
+Under ASGI the middleware runs on the event loop, so the views it wraps can be async too, and
+the timer is put on the connection of the thread synchronous code shares instead. Requests take
+turns on that connection, so a timer only counts the queries run for its own request.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+
+log = logging.getLogger("django.trainerdex.queries")
+
+# The timer of the request being served, where it may share a connection with others
+request_timer: ContextVar[Optional["QueryTimer"]] = ContextVar("request_timer", default=None)
+
+
+class QueryTimer:
+    """Counts and times every query run on a connection, see `timed_queries`"""
+
+    def __init__(self, statements: bool = False) -> None:
+        """
+        Parameters
+        ----------
+        statements: bool
+            Whether to keep the SQL of every query, for tests to show
+        """
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: Optional[List[str]] = [] if statements else None
+
+    def __call__(self, execute, sql, params, many, context):
+        if request_timer.get() not in (None, self):
+            # Another request's query
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+            if self.statements is not None:
+                self.statements.append(sql)
+
+
+@contextmanager
+def timed_queries(statements: bool = False) -> Iterator[QueryTimer]:
+    timer = QueryTimer(statements)
+    with connection.execute_wrapper(timer):
+        yield timer
+
+
+def add_timer(timer: QueryTimer) -> None:
+    connection.execute_wrappers.append(timer)
+
+
+def remove_timer(timer: QueryTimer) -> None:
+    connection.execute_wrappers.remove(timer)
+
+
+def get_endpoint(view_func: Callable, method: str) -> str:
+    """The dotted path of a view, followed by its action for DRF viewsets or else the method"""
+    view = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if view is None:
+        path = f"{view_func.__module__}.{view_func.__qualname__}"
+    else:
+        path = f"{view.__module__}.{view.__qualname__}"
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{path}.{actions.get(method.lower(), method.lower())}"
+
+
+class RequestMetrics:
+    def __init__(self, timer: QueryTimer) -> None:
+        self.timer = timer
+        self.endpoint: Optional[str] = None
+        self.start = time.perf_counter()
+        self.view_start: Optional[float] = None
+        self.view_end: Optional[float] = None
+        self.render_start: Optional[float] = None
+        self.render_end: Optional[float] = None
+        self.end: Optional[float] = None
+        # Query time is taken out of the view and render time it was spent in
+        self.view_sql = 0.0
+        self.render_sql = 0.0
+
+    @property
+    def queries(self) -> int:
+        return self.timer.queries
+
+    @property
+    def sql_ms(self) -> float:
+        return self.timer.seconds * 1000
+
+    @property
+    def view_ms(self) -> float:
+        if self.view_start is None or self.view_end is None:
+            return 0.0
+        return (self.view_end - self.view_start - self.view_sql) * 1000
+
+    @property
+    def render_ms(self) -> float:
+        if self.render_start is None or self.render_end is None:
+            return 0.0
+        return (self.render_end - self.render_start - self.render_sql) * 1000
+
+    @property
+    def total_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.endpoint,
+            "queries": self.queries,
+            "sql_ms": round(self.sql_ms, 2),
+            "view_ms": round(self.view_ms, 2),
+            "render_ms": round(self.render_ms, 2),
+            "total_ms": round(self.total_ms, 2),
+        }
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            [
+                f'sql;dur={self.sql_ms:.2f};desc="{self.queries} queries"',
+                f"view;dur={self.view_ms:.2f}",
+                f"render;dur={self.render_ms:.2f}",
+                f"total;dur={self.total_ms:.2f}",
+            ]
+        )
+
+
+class QueryMetricsMiddleware:
+    """Records `RequestMetrics` for every request, see the module docstring
+
+    The metrics are left on the response as `query_metrics`, for tests to check.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Tells Django to await this middleware, as `MiddlewareMixin` does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with timed_queries(settings.QUERY_METRICS_STATEMENTS) as timer:
+            request.query_metrics = metrics = RequestMetrics(timer)
+            response = self.get_response(request)
+        return self.finish(response, metrics)
+
+    async def __acall__(self, request):
+        timer = QueryTimer(settings.QUERY_METRICS_STATEMENTS)
+        request.query_metrics = metrics = RequestMetrics(timer)
+        token = request_timer.set(timer)
+        await sync_to_async(add_timer, thread_sensitive=True)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(remove_timer, thread_sensitive=True)(timer)
+            request_timer.reset(token)
+        return self.finish(response, metrics)
+
+    def finish(self, response, metrics: RequestMetrics):
+        timer = metrics.timer
+        metrics.end = time.perf_counter()
+        if metrics.view_start is not None and metrics.view_end is None:
+            # Not a template response, the view ended with the request
+            metrics.view_end = metrics.end
+            metrics.view_sql += timer.seconds
+
+        response.query_metrics = metrics
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = metrics.server_timing()
+        if metrics.endpoint is not None:
+            log.info(
+                json.dumps({**metrics.as_dict(), "status": response.status_code}),
+                extra={"query_metrics": metrics.as_dict()},
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs) -> None:
+        metrics = request.query_metrics
+        metrics.endpoint = get_endpoint(view_func, request.method)
+        metrics.view_start = time.perf_counter()
+        metrics.view_sql = -metrics.timer.seconds
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns, and after this
+        metrics = request.query_metrics
+        metrics.view_end = metrics.render_start = time.perf_counter()
+        metrics.view_sql += metrics.timer.seconds
+        metrics.render_sql = -metrics.timer.seconds
+
+        def rendered(response) -> None:
+            metrics.render_end = time.perf_counter()
+            metrics.render_sql += metrics.timer.seconds
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -1,32 +1,120 @@
-from typing import Union
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Tuple, Union
 
-from django.db.models import F, Max, Subquery, Window
-from django.db.models.functions import DenseRank
+from django.db import connections
+from django.db.models import Count, F, Max, OuterRef, Q, QuerySet, Subquery, Window
+from django.db.models.functions import Coalesce, DenseRank, RowNumber
 
-from trainerdex.fields import PogoDecimalField, PogoPositiveIntegerField
-from trainerdex.models import Trainer, Update
-from trainerdex.models import TrainerQuerySet, UpdateQuerySet
+from trainerdex.cache import LeaderboardCache
+from trainerdex.models import LeaderboardRank, Trainer, TrainerStats, Update
+from trainerdex.models import TrainerQuerySet, TrainerStatsQuerySet
+
+# The (value, datetime, trainer) of a row, which orders the leaderboard along with rank
+Key = Tuple[Union[int, Decimal], datetime, int]
+# A row of `Leaderboard.columns`
+Row = Tuple
 
 
 class Leaderboard:
+    # Read by `page` and `seek`, everything needed to show a trainer's place on the board
+    columns = (
+        "trainer_id",
+        "value",
+        "datetime",
+        "rank",
+        "trainer__username",
+        "trainer__faction_id",
+        "trainer__country",
+    ) + tuple(field.name for field in TrainerStats.stat_fields)
+
     def __init__(
         self,
         legacy_mode: bool = False,
         order_by: str = "total_xp",
         queryset: TrainerQuerySet = Trainer.objects.all(),
+        board: Optional[str] = None,
+        cache: Optional[LeaderboardCache] = None,
+        community: Optional[str] = None,
     ) -> None:
+        """
+        Parameters
+        ----------
+        board: str
+            A board in `LeaderboardRank` that holds exactly the trainers in `queryset`.
+            If given, ranks are read from it instead of being calculated.
+        cache: LeaderboardCache
+            If given, `count`, `page`, `seek` and `locate` are cached against the filters
+            that produced `queryset`.
+        community: str
+            The primary key, which is the handle, of a community whose members are exactly
+            the trainers in `queryset`.
+            If given, the members are joined to their stats instead of `queryset` being applied.
+        """
         self.order_by = order_by
         self.legacy = legacy_mode
-        self.__manager = LegacyLeaderboardManager() if self.legacy else LeaderboardManager()
+        self.board = board
+        self.cache = cache
+        if self.legacy:
+            self.__manager = LegacyLeaderboardManager()
+        elif self.board is not None and self.order_by in LeaderboardRank.ranked_stats:
+            self.__manager = RankedLeaderboardManager(self.board)
+        elif community is not None:
+            self.__manager = CommunityLeaderboardManager(community)
+        else:
+            self.__manager = LeaderboardManager()
         self.queryset = queryset
         self._query = self.__manager.get_queryset(o=self.order_by, q=self.queryset)
 
     @property
-    def objects(self) -> Union[UpdateQuerySet, TrainerQuerySet]:
-        if self.legacy:
-            return self._query.annotate(trainer=F("pk"))
-        else:
-            return self._query
+    def objects(self) -> TrainerStatsQuerySet:
+        return self._query
+
+    def _cached(self, default: Callable[[], Any], *parts: Any) -> Any:
+        if self.cache is None:
+            return default()
+        return self.cache.get_or_set(default, self.order_by, self.legacy, *parts)
+
+    def count(self) -> int:
+        return self._cached(self.objects.count, "count")
+
+    def page(self, offset: int, limit: int) -> List[Row]:
+        return self._cached(
+            lambda: list(self.objects.values_list(*self.columns)[offset : offset + limit]),
+            "page",
+            offset,
+            limit,
+        )
+
+    def locate(self, trainer: int) -> Optional[int]:
+        """The zero-based position of a trainer on the leaderboard, None if they're not on it"""
+        return self._cached(
+            lambda: self.__manager.locate(self._query, o=self.order_by, trainer=trainer),
+            "locate",
+            trainer,
+        )
+
+    def key(self, row: Row) -> Key:
+        trainer, value, datetime = row[:3]
+        return value, datetime, trainer
+
+    def seek(
+        self, key: Optional[Key] = None, limit: int = 100, reverse: bool = False
+    ) -> List[Row]:
+        """Up to `limit` rows after `key`, or before it if `reverse` is set, nearest first
+
+        Rank only ever follows value, so rows are found by (value, datetime, trainer) alone.
+        A key stays valid when other trainers move and ranks shift around it.
+        """
+        return self._cached(
+            lambda: self.__manager.seek(
+                self.objects.values_list(*self.columns), key=key, limit=limit, reverse=reverse
+            ),
+            "seek",
+            key,
+            limit,
+            reverse,
+        )
 
     def __str__(self) -> str:
         if self.legacy:
@@ -40,43 +128,193 @@ class Leaderboard:
 
 
 class LeaderboardManager:
-    def get_queryset(self, o: str, q: TrainerQuerySet) -> UpdateQuerySet:
+    def get_stats(self, q: TrainerQuerySet) -> TrainerStatsQuerySet:
+        return TrainerStats.objects.default_excludes().filter(trainer__in=q)
+
+    def get_queryset(self, o: str, q: TrainerQuerySet) -> TrainerStatsQuerySet:
         assert isinstance(q, TrainerQuerySet)
         return (
-            Update.objects.filter(
-                pk__in=Subquery(
-                    Update.objects.default_excludes()
-                    .filter(trainer__in=q)
-                    .annotate(value=F(o))
-                    .exclude(value__isnull=True)
-                    .order_by("trainer", "-value")
-                    .distinct("trainer")
-                    .values("pk")
-                )
-            )
-            .prefetch_related("trainer", "trainer__faction", "data_source")
-            .annotate(value=F(o), datetime=F("update_time"))
+            self.get_stats(q)
+            .select_related("trainer", "trainer__faction")
+            .annotate(value=F(o), datetime=F(f"{o}_datetime"))
+            .exclude(value__isnull=True)
             .annotate(rank=Window(expression=DenseRank(), order_by=F("value").desc()))
-            .order_by("rank", "-value", "datetime")
+            .order_by("rank", "-value", "datetime", "trainer_id")
         )
 
+    def locate(self, query: TrainerStatsQuerySet, o: str, trainer: int) -> Optional[int]:
+        return locate_by_row_number(query, key="trainer_id", trainer=trainer)
+
+    def seek(
+        self, query: TrainerStatsQuerySet, key: Optional[Key], limit: int, reverse: bool
+    ) -> List[Row]:
+        return seek_by_window(query, after=key, limit=limit, reverse=reverse)
+
+
+class CommunityLeaderboardManager(LeaderboardManager):
+    def __init__(self, community: str) -> None:
+        """
+        Parameters
+        ----------
+        community: str
+            The primary key of the community, its handle
+        """
+        self.community = community
+
+    def get_stats(self, q: TrainerQuerySet) -> TrainerStatsQuerySet:
+        """Joins the community's membership straight onto the snapshot, `q` is not applied
+
+        Filtering by `q` would rank the snapshot against a subquery of the members,
+        which is far slower for a large community than the join.
+        """
+        return TrainerStats.objects.default_excludes().filter(trainer__communities=self.community)
+
+
+class RankedLeaderboardManager:
+    def __init__(self, board: str) -> None:
+        self.board = board
 
-class LegacyLeaderboardManager:
-    def get_queryset(self, o: str, q: TrainerQuerySet) -> TrainerQuerySet:
+    def get_queryset(self, o: str, q: TrainerQuerySet) -> TrainerStatsQuerySet:
+        """Reads a precomputed board, `q` is not applied as the board defines the trainers"""
         assert isinstance(q, TrainerQuerySet)
         return (
-            q.default_excludes()
-            .prefetch_related("updates", "faction")
+            TrainerStats.objects.filter(trainer__ranks__stat=o, trainer__ranks__board=self.board)
+            .select_related("trainer", "trainer__faction")
             .annotate(
-                **{
-                    f"extra_max__{field.name}": Max(f"updates__{field.name}")
-                    for field in Update._meta.fields
-                    if isinstance(field, (PogoDecimalField, PogoPositiveIntegerField))
-                    and field.reversable is False
-                }
+                value=F(o),
+                datetime=F("trainer__ranks__datetime"),
+                rank=F("trainer__ranks__rank"),
+                ranked_value=F("trainer__ranks__value"),
             )
-            .annotate(value=Max(f"updates__{o}"), datetime=Max("updates__update_time"))
+            # Same order as rank, -value, but it can be read straight off `leaderboard_order_idx`
+            .order_by("-ranked_value", "datetime", "trainer_id")
+        )
+
+    def locate(self, query: TrainerStatsQuerySet, o: str, trainer: int) -> Optional[int]:
+        """Counts the rows ahead of the trainer on the rank index, in a single query"""
+        board = LeaderboardRank.objects.filter(stat=o, board=self.board)
+        ahead = (
+            board.filter(
+                Q(rank__lt=OuterRef("rank"))
+                | Q(rank=OuterRef("rank"), datetime__lt=OuterRef("datetime"))
+                | Q(rank=OuterRef("rank"), datetime=OuterRef("datetime"), trainer__lt=trainer)
+            )
+            .order_by()
+            .values("stat")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return (
+            board.filter(trainer=trainer)
+            .annotate(position=Coalesce(Subquery(ahead), 0))
+            .values_list("position", flat=True)
+            .first()
+        )
+
+    def seek(
+        self, query: TrainerStatsQuerySet, key: Optional[Key], limit: int, reverse: bool
+    ) -> List[Row]:
+        """Ranks are stored, so the board can be filtered directly"""
+        if key is not None:
+            value, when, trainer = key
+            if reverse:
+                query = query.filter(
+                    Q(ranked_value__gt=value)
+                    | Q(ranked_value=value, datetime__lt=when)
+                    | Q(ranked_value=value, datetime=when, trainer_id__lt=trainer)
+                )
+            else:
+                query = query.filter(
+                    Q(ranked_value__lt=value)
+                    | Q(ranked_value=value, datetime__gt=when)
+                    | Q(ranked_value=value, datetime=when, trainer_id__gt=trainer)
+                )
+        if reverse:
+            query = query.reverse()
+        return list(query[:limit])
+
+
+class LegacyLeaderboardManager(LeaderboardManager):
+    best_fields = {field.name for field in TrainerStats.stat_fields if field.reversable is False}
+
+    def get_queryset(self, o: str, q: TrainerQuerySet) -> TrainerStatsQuerySet:
+        """Reads the snapshot, as `LeaderboardManager` does, with the values legacy clients expect
+
+        `datetime` is when the trainer last updated and `value` is the best they've ever had.
+        The snapshot only holds the latest of reversable stats, so their best is looked up.
+        """
+        assert isinstance(q, TrainerQuerySet)
+        if o in self.best_fields:
+            value = F(o)
+        else:
+            value = Subquery(
+                Update.objects.filter(trainer=OuterRef("trainer"))
+                .order_by()
+                .values("trainer")
+                .annotate(best=Max(o))
+                .values("best")
+            )
+        return (
+            self.get_stats(q)
+            .select_related("trainer", "trainer__faction")
+            .annotate(value=value, datetime=F("update_time"))
             .exclude(value__isnull=True)
             .annotate(rank=Window(expression=DenseRank(), order_by=F("value").desc()))
-            .order_by("rank", "-value", "datetime")
+            .order_by("rank", "-value", "datetime", "trainer_id")
         )
+
+
+def locate_by_row_number(query: QuerySet, key: str, trainer: int) -> Optional[int]:
+    """Finds a trainer's position on a leaderboard ranked on the fly
+
+    Rank is a window over the filtered rows, so it can't be filtered on without changing it.
+    The whole board is numbered in a subquery and only the trainer's row is returned.
+    """
+    query = query.annotate(
+        focus=F(key),
+        position=Window(
+            expression=RowNumber(),
+            order_by=[F("value").desc(), F("datetime").asc(), F(key).asc()],
+        ),
+    ).order_by()
+    sql, params = query.query.sql_with_params()
+    with connections[query.db].cursor() as cursor:
+        cursor.execute(
+            f'SELECT "position" FROM ({sql}) AS "leaderboard" WHERE "focus" = %s',
+            params + (trainer,),
+        )
+        row = cursor.fetchone()
+    return None if row is None else row[0] - 1
+
+
+def seek_by_window(
+    query: TrainerStatsQuerySet, after: Optional[Key], limit: int, reverse: bool
+) -> List[Row]:
+    """Pages through a leaderboard ranked on the fly without an offset
+
+    As with `locate_by_row_number`, the board is ranked in a subquery and only filtered outside it.
+    `query` is a `values_list`, the rows come back in the same shape.
+    """
+    sql, params = query.order_by().query.sql_with_params()
+    if reverse:
+        where = 'WHERE "value" > %s OR ("value" = %s AND ("datetime", "trainer_id") < (%s, %s))'
+        order = '"value" ASC, "datetime" DESC, "trainer_id" DESC'
+    else:
+        where = 'WHERE "value" < %s OR ("value" = %s AND ("datetime", "trainer_id") > (%s, %s))'
+        order = '"value" DESC, "datetime" ASC, "trainer_id" ASC'
+    if after is None:
+        where = ""
+    else:
+        value, when, trainer = after
+        params += (value, value, when, trainer)
+    with connections[query.db].cursor() as cursor:
+        cursor.execute(
+            f'SELECT * FROM ({sql}) AS "leaderboard" {where} ORDER BY {order} LIMIT %s',
+            params + (limit,),
+        )
+        rows = cursor.fetchall()
+
+    # SQL selects fields before annotations, `values_list` puts them back in the order asked for
+    selected = [*query.query.values_select, *query.query.annotation_select]
+    order = [selected.index(name) for name in query._fields]
+    return [tuple(row[i] for i in order) for row in rows]
@@ -0,0 +1,97 @@
+import json
+import time
+from typing import List, Tuple
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from trainerdex.benchmarks import generator, harness
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    try:
+        trainers, updates = (int(x) for x in size.lower().split("x"))
+    except ValueError:
+        raise CommandError(f"Sizes look like 1000x10 (trainers x updates each), not {size}")
+    return trainers, updates
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks every leaderboard mode against generated trainers and updates. "
+        "Runs in a test database, which is created and destroyed unless --keepdb is passed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=parse_size,
+            default=[(1000, 10), (10000, 10)],
+            help="Sizes to benchmark at, as trainers x updates each, eg. 1000x10",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed for the generated data, the same seed always generates the same data",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="How many times to run each case, the median is reported",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="Page size",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database between runs",
+        )
+        parser.add_argument(
+            "--json",
+            help="Also write the results to this file",
+        )
+
+    def handle(self, *args, **options):
+        verbosity = options["verbosity"]
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=verbosity, autoclobber=True, keepdb=options["keepdb"]
+        )
+        try:
+            results = []
+            for trainers, updates in options["sizes"]:
+                size = f"{trainers}x{updates}"
+                start = time.perf_counter()
+                generator.generate(trainers, updates, seed=options["seed"])
+                if verbosity:
+                    self.stdout.write(f"Generated {size} in {time.perf_counter() - start:.1f}s")
+                results += harness.run(size, repeat=options["repeat"], limit=options["limit"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        self.write_table(results)
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump([result._asdict() for result in results], f, indent=2)
+
+    def write_table(self, results: List[harness.Result]) -> None:
+        header = (
+            f"{'size':>10} {'case':<20} {'queries':>7} {'sql ms':>9} {'python ms':>9} "
+            f"{'json ms':>9} {'peak KiB':>9}"
+        )
+        self.stdout.write(self.style.MIGRATE_HEADING(header))
+        for result in results:
+            self.stdout.write(
+                f"{result.size:>10} {result.case:<20} {result.queries:>7} {result.sql_ms:>9.2f} "
+                f"{result.python_ms:>9.2f} {result.serialize_ms:>9.2f} {result.peak_kib:>9.0f}"
+            )
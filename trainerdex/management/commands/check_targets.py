@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from trainerdex.models import Target
+
+
+class Command(BaseCommand):
+    help = (
+        "Works out whether, and when, every target has been reached from the full update history"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "trainers",
+            nargs="*",
+            type=int,
+            help="Only check the targets of the trainers with these IDs",
+        )
+        parser.add_argument(
+            "--open",
+            action="store_true",
+            help="Only check targets that haven't been reached yet",
+        )
+
+    def handle(self, *args, **options):
+        targets = Target.objects.all()
+        if options["trainers"]:
+            targets = targets.filter(trainer__in=options["trainers"])
+        count = (targets.open() if options["open"] else targets).check_reached()
+        reached = targets.filter(has_reached=True).count()
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {count} targets, {reached} of {targets.count()} reached")
+        )
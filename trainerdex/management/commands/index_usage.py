@@ -0,0 +1,60 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+USAGE_SQL = """
+SELECT
+    s.relname,
+    s.indexrelname,
+    s.idx_scan,
+    s.idx_tup_read,
+    s.idx_tup_fetch,
+    pg_relation_size(s.indexrelid)
+FROM pg_stat_user_indexes s
+WHERE s.relname = ANY(%s)
+ORDER BY s.idx_scan, pg_relation_size(s.indexrelid) DESC
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports how often each index has been used since PostgreSQL's statistics were last reset, "
+        "least used first, so indexes that don't earn their keep can be found."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "app_labels",
+            nargs="*",
+            default=["trainerdex"],
+            help="Only report on the tables of these apps",
+        )
+        parser.add_argument(
+            "--unused",
+            action="store_true",
+            help="Only report indexes that have never been scanned",
+        )
+
+    def handle(self, *args, **options):
+        tables = [
+            model._meta.db_table
+            for label in options["app_labels"]
+            for model in apps.get_app_config(label).get_models()
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(USAGE_SQL, [tables])
+            rows = cursor.fetchall()
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"{'table':<32} {'index':<48} {'scans':>10} {'read':>12} {'fetched':>12} {'size':>10}"
+            )
+        )
+        for table, index, scans, read, fetched, size in rows:
+            if options["unused"] and scans:
+                continue
+            line = (
+                f"{table:<32} {index:<48} {scans:>10} {read:>12} {fetched:>12} "
+                f"{size // 1024:>8}kB"
+            )
+            self.stdout.write(self.style.WARNING(line) if not scans else line)
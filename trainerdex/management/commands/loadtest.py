@@ -0,0 +1,102 @@
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.core.management.base import BaseCommand
+
+DEFAULT_PATHS = ["/api/v2/leaderboard/", "/api/v1/trainers/1/", "/api/v1/trainers/1/updates/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends concurrent requests to a running server and reports the throughput and latency "
+        "of each path, to compare serving the API over WSGI and ASGI. For example, run it once "
+        "against `manage.py runserver` and once against `uvicorn config.asgi:application`. "
+        "Only 2xx and 304 responses count as successes, the rest are reported by status."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("base_url", help="Where the server is, eg. http://127.0.0.1:8000")
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            default=DEFAULT_PATHS,
+            help="Paths to request in turn, by every client",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=32, help="How many clients to run at once"
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30, help="How many seconds to send requests for"
+        )
+        parser.add_argument("--token", help="An OAuth2 access token, for the v2 endpoints")
+
+    def handle(self, *args, **options):
+        paths = options["paths"]
+        headers = {"Authorization": f"Bearer {options['token']}"} if options["token"] else {}
+        deadline = time.perf_counter() + options["duration"]
+        latencies = defaultdict(list)
+        # Responses that weren't a success, by status, or None for no response at all
+        failures = defaultdict(lambda: defaultdict(int))
+        lock = threading.Lock()
+
+        def client(n: int) -> None:
+            session = requests.Session()
+            session.headers.update(headers)
+            i = n
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    code = session.get(urljoin(options["base_url"], path)).status_code
+                except requests.RequestException:
+                    code = None
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if code is not None and (200 <= code < 300 or code == 304):
+                        latencies[path].append(elapsed)
+                    else:
+                        failures[path][code] += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(client, range(options["concurrency"])))
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"{'path':<48} {'ok':>9} {'failed':>7} {'req/s':>8} "
+                f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"
+            )
+        )
+        for path in paths:
+            times = sorted(latencies[path])
+            failed = sum(failures[path].values())
+            if not times:
+                self.stdout.write(f"{path:<48} {0:>9} {failed:>7}")
+                continue
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            self.stdout.write(
+                f"{path:<48} {len(times):>9} {failed:>7} {len(times) / elapsed:>8.1f} "
+                f"{statistics.median(times) * 1000:>8.1f} {p95 * 1000:>8.1f} "
+                f"{times[-1] * 1000:>8.1f}"
+            )
+        total = sum(len(times) for times in latencies.values())
+        self.stdout.write(
+            f"{total} successful requests in {elapsed:.1f}s, {total / elapsed:.1f} req/s"
+        )
+
+        for path in paths:
+            if failures[path]:
+                counts = ", ".join(
+                    f"{count} x {'no response' if code is None else code}"
+                    for code, count in sorted(
+                        failures[path].items(), key=lambda item: (item[0] is None, item[0] or 0)
+                    )
+                )
+                self.stdout.write(self.style.WARNING(f"{path} failed with {counts}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from trainerdex.models import LeaderboardRank
+
+
+class Command(BaseCommand):
+    help = "Recalculates the precomputed leaderboard ranks from the trainer stats snapshots"
+
+    def handle(self, *args, **options):
+        count = LeaderboardRank.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} leaderboard ranks"))
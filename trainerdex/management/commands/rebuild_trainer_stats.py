@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from trainerdex.models import TrainerStats
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the stats snapshot of every trainer from their full update history"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "trainers",
+            nargs="*",
+            type=int,
+            help="Only rebuild the snapshots of the trainers with these IDs",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="How many snapshots to insert per query",
+        )
+
+    def handle(self, *args, **options):
+        count = TrainerStats.objects.rebuild(
+            trainers=options["trainers"] or None,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} trainer stats snapshots"))
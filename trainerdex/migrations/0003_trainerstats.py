@@ -0,0 +1,150 @@
+# Generated by Django 3.1.14 on 2026-10-17 06:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainerdex', '0002_auto_20200917_1005'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainerStats',
+            fields=[
+                ('trainer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='trainerdex.trainer', verbose_name='trainer')),
+                ('update_time', models.DateTimeField(blank=True, null=True, verbose_name='Time Updated')),
+                ('last_modified', models.DateTimeField(auto_now=True, verbose_name='Last Modified')),
+                ('total_xp', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total XP')),
+                ('total_xp_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_total_caught', models.PositiveIntegerField(blank=True, null=True, verbose_name='Unique Species Caught')),
+                ('pokedex_total_caught_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_total_seen', models.PositiveIntegerField(blank=True, null=True, verbose_name='Unique Species Seen')),
+                ('pokedex_total_seen_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_gen1', models.PositiveIntegerField(blank=True, null=True, verbose_name='Kanto')),
+                ('pokedex_gen1_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_gen2', models.PositiveIntegerField(blank=True, null=True, verbose_name='Johto')),
+                ('pokedex_gen2_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_gen3', models.PositiveIntegerField(blank=True, null=True, verbose_name='Hoenn')),
+                ('pokedex_gen3_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_gen4', models.PositiveIntegerField(blank=True, null=True, verbose_name='Sinnoh')),
+                ('pokedex_gen4_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_gen5', models.PositiveIntegerField(blank=True, null=True, verbose_name='Unova')),
+                ('pokedex_gen5_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_gen6', models.PositiveIntegerField(blank=True, null=True, verbose_name='Kalos')),
+                ('pokedex_gen6_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_gen7', models.PositiveIntegerField(blank=True, null=True, verbose_name='Alola')),
+                ('pokedex_gen7_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokedex_gen8', models.PositiveIntegerField(blank=True, null=True, verbose_name='Galar')),
+                ('pokedex_gen8_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('travel_km', models.DecimalField(blank=True, decimal_places=2, max_digits=16, null=True, verbose_name='Jogger (Distance Walked)')),
+                ('travel_km_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('capture_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Collector (Pokémon Caught)')),
+                ('capture_total_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('evolved_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Scientist')),
+                ('evolved_total_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('hatched_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Breeder')),
+                ('hatched_total_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokestops_visited', models.PositiveIntegerField(blank=True, null=True, verbose_name='Backpacker (PokéStops Visited)')),
+                ('pokestops_visited_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('big_magikarp', models.PositiveIntegerField(blank=True, null=True, verbose_name='Fisher')),
+                ('big_magikarp_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('battle_attack_won', models.PositiveIntegerField(blank=True, null=True, verbose_name='Battle Girl')),
+                ('battle_attack_won_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('battle_training_won', models.PositiveIntegerField(blank=True, null=True, verbose_name='Ace Trainer')),
+                ('battle_training_won_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('small_rattata', models.PositiveIntegerField(blank=True, null=True, verbose_name='Youngster')),
+                ('small_rattata_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pikachu', models.PositiveIntegerField(blank=True, null=True, verbose_name='Pikachu Fan')),
+                ('pikachu_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('unown', models.PositiveIntegerField(blank=True, null=True, verbose_name='Unown')),
+                ('unown_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('raid_battle_won', models.PositiveIntegerField(blank=True, null=True, verbose_name='Champion')),
+                ('raid_battle_won_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('legendary_battle_won', models.PositiveIntegerField(blank=True, null=True, verbose_name='Battle Legend')),
+                ('legendary_battle_won_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('berries_fed', models.PositiveIntegerField(blank=True, null=True, verbose_name='Berry Master')),
+                ('berries_fed_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('hours_defended', models.PositiveIntegerField(blank=True, null=True, verbose_name='Gym Leader')),
+                ('hours_defended_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('challenge_quests', models.PositiveIntegerField(blank=True, null=True, verbose_name='Pokémon Ranger')),
+                ('challenge_quests_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('max_level_friends', models.PositiveIntegerField(blank=True, null=True, verbose_name='Idol')),
+                ('max_level_friends_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('trading', models.PositiveIntegerField(blank=True, null=True, verbose_name='Gentleman')),
+                ('trading_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('trading_distance', models.PositiveIntegerField(blank=True, null=True, verbose_name='Pilot')),
+                ('trading_distance_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('great_league', models.PositiveIntegerField(blank=True, null=True, verbose_name='Great League Veteran')),
+                ('great_league_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('ultra_league', models.PositiveIntegerField(blank=True, null=True, verbose_name='Ultra League Veteran')),
+                ('ultra_league_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('master_league', models.PositiveIntegerField(blank=True, null=True, verbose_name='Master League Veteran')),
+                ('master_league_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('photobomb', models.PositiveIntegerField(blank=True, null=True, verbose_name='Cameraman')),
+                ('photobomb_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('pokemon_purified', models.PositiveIntegerField(blank=True, null=True, verbose_name='Purifier')),
+                ('pokemon_purified_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('rocket_grunts_defeated', models.PositiveIntegerField(blank=True, null=True, verbose_name='Hero')),
+                ('rocket_grunts_defeated_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('rocket_giovanni_defeated', models.PositiveIntegerField(blank=True, null=True, verbose_name='Ulta Hero')),
+                ('rocket_giovanni_defeated_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('buddy_best', models.PositiveIntegerField(blank=True, null=True, verbose_name='Best Buddy')),
+                ('buddy_best_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('wayfarer', models.PositiveIntegerField(blank=True, null=True, verbose_name='Wayfarer')),
+                ('wayfarer_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('total_mega_evos', models.PositiveIntegerField(blank=True, null=True, verbose_name='Successor')),
+                ('total_mega_evos_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('unique_mega_evos', models.PositiveIntegerField(blank=True, null=True, verbose_name='Mega Evolution Guru')),
+                ('unique_mega_evos_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_normal', models.PositiveIntegerField(blank=True, null=True, verbose_name='Schoolkid')),
+                ('type_normal_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_fighting', models.PositiveIntegerField(blank=True, null=True, verbose_name='Black Belt')),
+                ('type_fighting_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_flying', models.PositiveIntegerField(blank=True, null=True, verbose_name='Bird Keeper')),
+                ('type_flying_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_poison', models.PositiveIntegerField(blank=True, null=True, verbose_name='Punk Girl')),
+                ('type_poison_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_ground', models.PositiveIntegerField(blank=True, null=True, verbose_name='Ruin Maniac')),
+                ('type_ground_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_rock', models.PositiveIntegerField(blank=True, null=True, verbose_name='Hiker')),
+                ('type_rock_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_bug', models.PositiveIntegerField(blank=True, null=True, verbose_name='Bug Catcher')),
+                ('type_bug_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_ghost', models.PositiveIntegerField(blank=True, null=True, verbose_name='Hex Maniac')),
+                ('type_ghost_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_steel', models.PositiveIntegerField(blank=True, null=True, verbose_name='Rail Staff')),
+                ('type_steel_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_fire', models.PositiveIntegerField(blank=True, null=True, verbose_name='Kindler')),
+                ('type_fire_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_water', models.PositiveIntegerField(blank=True, null=True, verbose_name='Swimmer')),
+                ('type_water_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_grass', models.PositiveIntegerField(blank=True, null=True, verbose_name='Gardener')),
+                ('type_grass_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_electric', models.PositiveIntegerField(blank=True, null=True, verbose_name='Rocker')),
+                ('type_electric_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_psychic', models.PositiveIntegerField(blank=True, null=True, verbose_name='Psychic')),
+                ('type_psychic_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_ice', models.PositiveIntegerField(blank=True, null=True, verbose_name='Skier')),
+                ('type_ice_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_dragon', models.PositiveIntegerField(blank=True, null=True, verbose_name='Dragon Tamer')),
+                ('type_dragon_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_dark', models.PositiveIntegerField(blank=True, null=True, verbose_name='Delinquent')),
+                ('type_dark_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('type_fairy', models.PositiveIntegerField(blank=True, null=True, verbose_name='Fairy Tale Girl')),
+                ('type_fairy_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('gymbadges_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Gym Badges')),
+                ('gymbadges_total_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('gymbadges_gold', models.PositiveIntegerField(blank=True, null=True, verbose_name='Gold Gym Badges')),
+                ('gymbadges_gold_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('stardust', models.PositiveIntegerField(blank=True, null=True, verbose_name='Stardust')),
+                ('stardust_datetime', models.DateTimeField(blank=True, editable=False, null=True)),
+            ],
+            options={
+                'verbose_name': 'stats',
+                'verbose_name_plural': 'stats',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.1.14 on 2026-10-17 07:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainerdex', '0003_trainerstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardRank',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stat', models.CharField(choices=[('total_xp', 'Total XP'), ('pokedex_gen1', 'Kanto'), ('pokedex_gen2', 'Johto'), ('pokedex_gen3', 'Hoenn'), ('pokedex_gen4', 'Sinnoh'), ('pokedex_gen5', 'Unova'), ('pokedex_gen6', 'Kalos'), ('pokedex_gen7', 'Alola'), ('pokedex_gen8', 'Galar'), ('travel_km', 'Jogger (Distance Walked)'), ('capture_total', 'Collector (Pokémon Caught)'), ('evolved_total', 'Scientist'), ('hatched_total', 'Breeder'), ('pokestops_visited', 'Backpacker (PokéStops Visited)'), ('big_magikarp', 'Fisher'), ('battle_attack_won', 'Battle Girl'), ('battle_training_won', 'Ace Trainer'), ('small_rattata', 'Youngster'), ('pikachu', 'Pikachu Fan'), ('unown', 'Unown'), ('raid_battle_won', 'Champion'), ('legendary_battle_won', 'Battle Legend'), ('berries_fed', 'Berry Master'), ('hours_defended', 'Gym Leader'), ('challenge_quests', 'Pokémon Ranger'), ('max_level_friends', 'Idol'), ('trading', 'Gentleman'), ('trading_distance', 'Pilot'), ('great_league', 'Great League Veteran'), ('ultra_league', 'Ultra League Veteran'), ('master_league', 'Master League Veteran'), ('photobomb', 'Cameraman'), ('pokemon_purified', 'Purifier'), ('rocket_grunts_defeated', 'Hero'), ('rocket_giovanni_defeated', 'Ulta Hero'), ('buddy_best', 'Best Buddy'), ('wayfarer', 'Wayfarer'), ('total_mega_evos', 'Successor'), ('unique_mega_evos', 'Mega Evolution Guru'), ('type_normal', 'Schoolkid'), ('type_fighting', 'Black Belt'), ('type_flying', 'Bird Keeper'), ('type_poison', 'Punk Girl'), ('type_ground', 'Ruin Maniac'), ('type_rock', 'Hiker'), ('type_bug', 'Bug Catcher'), ('type_ghost', 'Hex Maniac'), ('type_steel', 'Rail Staff'), ('type_fire', 'Kindler'), ('type_water', 'Swimmer'), ('type_grass', 'Gardener'), ('type_electric', 'Rocker'), ('type_psychic', 'Psychic'), ('type_ice', 'Skier'), ('type_dragon', 'Dragon Tamer'), ('type_dark', 'Delinquent'), ('type_fairy', 'Fairy Tale Girl')], max_length=24, verbose_name='stat')),
+                ('board', models.CharField(max_length=16)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('datetime', models.DateTimeField(blank=True, null=True)),
+                ('rank', models.PositiveIntegerField()),
+                ('trainer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to=settings.AUTH_USER_MODEL, verbose_name='trainer')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardrank',
+            index=models.Index(fields=['stat', 'board', 'rank'], name='leaderboard_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardrank',
+            index=models.Index(fields=['stat', 'board', 'value'], name='leaderboard_value_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardrank',
+            constraint=models.UniqueConstraint(fields=('stat', 'board', 'trainer'), name='unique_rank'),
+        ),
+    ]
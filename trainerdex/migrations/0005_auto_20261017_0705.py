@@ -0,0 +1,24 @@
+# Generated by Django 3.1.14 on 2026-10-17 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trainerdex", "0004_auto_20261017_0701"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="leaderboardrank",
+            name="leaderboard_value_idx",
+        ),
+        migrations.AddIndex(
+            model_name="leaderboardrank",
+            index=models.Index(
+                fields=["stat", "board", "-value", "datetime", "trainer"],
+                name="leaderboard_order_idx",
+            ),
+        ),
+    ]
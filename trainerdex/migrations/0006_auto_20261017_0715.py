@@ -0,0 +1,252 @@
+# Generated by Django 3.1.14 on 2026-10-17 07:15
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Updates is the biggest table, so its indexes are built without locking out writes
+    atomic = False
+
+    dependencies = [
+        ('trainerdex', '0005_auto_20261017_0705'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='trainer',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_banned', False), ('is_verified', True)), fields=['id'], name='trainer_eligible_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(fields=['trainer', '-update_time'], name='update_trainer_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(total_xp__isnull=False), fields=['trainer', '-total_xp'], name='u_total_xp_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokedex_gen1__isnull=False), fields=['trainer', '-pokedex_gen1'], name='u_pokedex_gen1_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokedex_gen2__isnull=False), fields=['trainer', '-pokedex_gen2'], name='u_pokedex_gen2_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokedex_gen3__isnull=False), fields=['trainer', '-pokedex_gen3'], name='u_pokedex_gen3_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokedex_gen4__isnull=False), fields=['trainer', '-pokedex_gen4'], name='u_pokedex_gen4_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokedex_gen5__isnull=False), fields=['trainer', '-pokedex_gen5'], name='u_pokedex_gen5_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokedex_gen6__isnull=False), fields=['trainer', '-pokedex_gen6'], name='u_pokedex_gen6_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokedex_gen7__isnull=False), fields=['trainer', '-pokedex_gen7'], name='u_pokedex_gen7_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokedex_gen8__isnull=False), fields=['trainer', '-pokedex_gen8'], name='u_pokedex_gen8_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(travel_km__isnull=False), fields=['trainer', '-travel_km'], name='u_travel_km_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(capture_total__isnull=False), fields=['trainer', '-capture_total'], name='u_capture_total_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(evolved_total__isnull=False), fields=['trainer', '-evolved_total'], name='u_evolved_total_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(hatched_total__isnull=False), fields=['trainer', '-hatched_total'], name='u_hatched_total_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokestops_visited__isnull=False), fields=['trainer', '-pokestops_visited'], name='u_pokestops_visited_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(big_magikarp__isnull=False), fields=['trainer', '-big_magikarp'], name='u_big_magikarp_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(battle_attack_won__isnull=False), fields=['trainer', '-battle_attack_won'], name='u_battle_attack_won_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(battle_training_won__isnull=False), fields=['trainer', '-battle_training_won'], name='u_battle_training_won_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(small_rattata__isnull=False), fields=['trainer', '-small_rattata'], name='u_small_rattata_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pikachu__isnull=False), fields=['trainer', '-pikachu'], name='u_pikachu_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(unown__isnull=False), fields=['trainer', '-unown'], name='u_unown_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(raid_battle_won__isnull=False), fields=['trainer', '-raid_battle_won'], name='u_raid_battle_won_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(legendary_battle_won__isnull=False), fields=['trainer', '-legendary_battle_won'], name='u_legendary_battle_won_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(berries_fed__isnull=False), fields=['trainer', '-berries_fed'], name='u_berries_fed_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(hours_defended__isnull=False), fields=['trainer', '-hours_defended'], name='u_hours_defended_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(challenge_quests__isnull=False), fields=['trainer', '-challenge_quests'], name='u_challenge_quests_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(max_level_friends__isnull=False), fields=['trainer', '-max_level_friends'], name='u_max_level_friends_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(trading__isnull=False), fields=['trainer', '-trading'], name='u_trading_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(trading_distance__isnull=False), fields=['trainer', '-trading_distance'], name='u_trading_distance_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(great_league__isnull=False), fields=['trainer', '-great_league'], name='u_great_league_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(ultra_league__isnull=False), fields=['trainer', '-ultra_league'], name='u_ultra_league_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(master_league__isnull=False), fields=['trainer', '-master_league'], name='u_master_league_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(photobomb__isnull=False), fields=['trainer', '-photobomb'], name='u_photobomb_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(pokemon_purified__isnull=False), fields=['trainer', '-pokemon_purified'], name='u_pokemon_purified_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(rocket_grunts_defeated__isnull=False), fields=['trainer', '-rocket_grunts_defeated'], name='u_rocket_grunts_defeated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(rocket_giovanni_defeated__isnull=False), fields=['trainer', '-rocket_giovanni_defeated'], name='u_rocket_giovanni_defeated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(buddy_best__isnull=False), fields=['trainer', '-buddy_best'], name='u_buddy_best_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(wayfarer__isnull=False), fields=['trainer', '-wayfarer'], name='u_wayfarer_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(total_mega_evos__isnull=False), fields=['trainer', '-total_mega_evos'], name='u_total_mega_evos_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(unique_mega_evos__isnull=False), fields=['trainer', '-unique_mega_evos'], name='u_unique_mega_evos_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_normal__isnull=False), fields=['trainer', '-type_normal'], name='u_type_normal_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_fighting__isnull=False), fields=['trainer', '-type_fighting'], name='u_type_fighting_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_flying__isnull=False), fields=['trainer', '-type_flying'], name='u_type_flying_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_poison__isnull=False), fields=['trainer', '-type_poison'], name='u_type_poison_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_ground__isnull=False), fields=['trainer', '-type_ground'], name='u_type_ground_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_rock__isnull=False), fields=['trainer', '-type_rock'], name='u_type_rock_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_bug__isnull=False), fields=['trainer', '-type_bug'], name='u_type_bug_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_ghost__isnull=False), fields=['trainer', '-type_ghost'], name='u_type_ghost_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_steel__isnull=False), fields=['trainer', '-type_steel'], name='u_type_steel_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_fire__isnull=False), fields=['trainer', '-type_fire'], name='u_type_fire_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_water__isnull=False), fields=['trainer', '-type_water'], name='u_type_water_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_grass__isnull=False), fields=['trainer', '-type_grass'], name='u_type_grass_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_electric__isnull=False), fields=['trainer', '-type_electric'], name='u_type_electric_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_psychic__isnull=False), fields=['trainer', '-type_psychic'], name='u_type_psychic_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_ice__isnull=False), fields=['trainer', '-type_ice'], name='u_type_ice_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_dragon__isnull=False), fields=['trainer', '-type_dragon'], name='u_type_dragon_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_dark__isnull=False), fields=['trainer', '-type_dark'], name='u_type_dark_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='update',
+            index=models.Index(condition=models.Q(type_fairy__isnull=False), fields=['trainer', '-type_fairy'], name='u_type_fairy_idx'),
+        ),
+    ]
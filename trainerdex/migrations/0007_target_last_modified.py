@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-17 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainerdex', '0006_auto_20261017_0715'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='target',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Last Modified'),
+        ),
+    ]
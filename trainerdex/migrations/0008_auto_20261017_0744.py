@@ -0,0 +1,27 @@
+# Generated by Django 3.1.14 on 2026-10-17 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainerdex', '0007_target_last_modified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidenceimage',
+            name='height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='evidenceimage',
+            name='width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='evidence',
+            index=models.Index(condition=models.Q(approval=False), fields=['content_type', 'object_pk'], name='evidence_pending_idx'),
+        ),
+    ]
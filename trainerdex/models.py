@@ -1,12 +1,14 @@
 import datetime
+import functools
 import logging
 import uuid
 import re
-from typing import Dict, Iterator, List, Union
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import django.contrib.postgres.fields
 from django.conf import settings
-from django.contrib.auth.models import UserManager
+from django.contrib.auth.models import Group, Permission, UserManager
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
@@ -16,9 +18,11 @@ from django.core.validators import (
     MinLengthValidator,
     MinValueValidator,
 )
-from django.db import models
-from django.db.models import F, Q
-from django.db.models.signals import post_save
+from django.db import connection, models, transaction
+from django.db.models import Exists, Min, OuterRef, Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.templatetags.static import static
 from django.utils import timezone
@@ -36,6 +40,7 @@ from django_lifecycle import hook, LifecycleModelMixin
 from exclusivebooleanfield.fields import ExclusiveBooleanField
 
 from trainerdex.abstract import AbstractUser
+from trainerdex.cache import LeaderboardCache
 from trainerdex.fields import PogoDecimalField, PogoPositiveIntegerField
 from trainerdex.validators import FriendCodeValidator, PokemonGoUsernameValidator
 
@@ -110,15 +115,49 @@ class TrainerQuerySet(models.QuerySet):
     def exclude_empty(self: models.QuerySet) -> models.QuerySet:
         return self.exclude(update__isnull=True)
 
+    def awaiting_verification(self: models.QuerySet) -> models.QuerySet:
+        """Unverified trainers whose profile evidence has been submitted, but not approved
+
+        Read off `evidence_pending_idx` in one query, rather than a query or two per trainer.
+        """
+        return self.filter(is_verified=False).filter(
+            Exists(Evidence.objects.pending().for_trainer(OuterRef("pk")))
+        )
+
     def default_excludes(self: models.QuerySet) -> models.QuerySet:
         return self.exclude_banned().exclude_unverified().exclude_deactived()
 
     def get_leaderboard(
-        self, legacy_mode: bool = False, order_by: str = "total_xp"
+        self, legacy_mode: bool = False, order_by: str = "total_xp", board: str = None
     ) -> models.QuerySet:
         from trainerdex.leaderboard import Leaderboard
 
-        return Leaderboard(legacy_mode, order_by, queryset=self).objects
+        return Leaderboard(legacy_mode, order_by, queryset=self, board=board).objects
+
+    def sharing_friend_code(self: models.QuerySet, to: str) -> models.QuerySet:
+        """Trainers who share their friend code `to` "groups", "web" or "api", in one query
+
+        The same trainers `has_perm(f"trainerdex.share_friend_code_to_{to}")` is True for,
+        whether it's granted directly, through a group or by being an active superuser,
+        without loading each of their permissions.
+        """
+        permission = Permission.objects.filter(
+            content_type__app_label="trainerdex", codename=f"share_friend_code_to_{to}"
+        )
+        granted = self.model.objects.filter(is_active=True).filter(
+            Q(is_superuser=True)
+            | Q(user_permissions__in=permission)
+            | Q(groups__permissions__in=permission)
+        )
+        return self.filter(pk__in=granted.values("pk"))
+
+    def touch(self: models.QuerySet) -> int:
+        """Marks the trainers as modified, for what's shown with them but saved elsewhere
+
+        Conditional GETs of a trainer are worked out from their `last_modified`, which their
+        codenames, friend code and who it's shared with don't otherwise change.
+        """
+        return self.update(last_modified=timezone.now())
 
 
 class TrainerManager(UserManager):
@@ -134,6 +173,48 @@ class TrainerManager(UserManager):
     def exclude_deactived(self) -> models.QuerySet:
         return self.get_queryset().exclude_deactived()
 
+    def awaiting_verification(self) -> models.QuerySet:
+        return self.get_queryset().awaiting_verification()
+
+    def provision(self, trainers: Iterable["Trainer"], batch_size: int = 500) -> List["Trainer"]:
+        """Creates many trainers at once, with the codename and evidence a signup gets
+
+        Trainers are inserted with `bulk_create`, so `create_codename` and `create_evidence`
+        don't fire and their rows are inserted in bulk here instead. Trainers without a
+        password are given an unusable one.
+
+        Returns
+        -------
+        The trainers, with their primary keys set
+        """
+        trainers = list(trainers)
+        for trainer in trainers:
+            if not trainer.password:
+                trainer.set_unusable_password()
+
+        with transaction.atomic():
+            self.bulk_create(trainers, batch_size=batch_size)
+            Codename.objects.bulk_create(
+                [
+                    Codename(user=trainer, codename=trainer.username, active=True)
+                    for trainer in trainers
+                ],
+                batch_size=batch_size,
+            )
+            content_type = ContentType.objects.get_for_model(self.model)
+            Evidence.objects.bulk_create(
+                [
+                    Evidence(
+                        content_type=content_type,
+                        object_pk=trainer.pk,
+                        content_field="trainer.profile",
+                    )
+                    for trainer in trainers
+                ],
+                batch_size=batch_size,
+            )
+        return trainers
+
     def exclude_empty(self) -> models.QuerySet:
         return self.get_queryset().exclude_empty()
 
@@ -201,8 +282,8 @@ class Trainer(AbstractUser):
         return self.evidence.first().approval
 
     def awaiting_verification(self) -> bool:
-        return self.has_evidence_been_submitted() and not any(
-            self.verified, self.has_evidence_been_approved()
+        return self.has_evidence_been_submitted() and not (
+            self.is_verified or self.has_evidence_been_approved()
         )
 
     @property
@@ -219,6 +300,26 @@ class Trainer(AbstractUser):
 
     leaderboard_eligibility.boolean = True
 
+    @hook(
+        "after_update",
+        when_any=["is_banned", "is_verified", "is_active", "country", "faction"],
+        has_changed=True,
+    )
+    def update_leaderboard_ranks(self) -> None:
+        LeaderboardRank.objects.sync(self)
+        LeaderboardCache.invalidate_trainer(
+            self,
+            scopes=[
+                f"faction:{self.initial_value('faction')}",
+                f"country:{self.initial_value('country')}",
+            ],
+        )
+
+    @hook("after_update", when="username", has_changed=True)
+    def invalidate_leaderboard_pages(self) -> None:
+        # Boards show the trainer's codename, which an active `Codename` saves as their username
+        LeaderboardCache.invalidate_trainer(self)
+
     @property
     def codename(self) -> str:
         return self.username
@@ -242,6 +343,14 @@ class Trainer(AbstractUser):
     class Meta(AbstractUser.Meta):
         verbose_name = npgettext_lazy("trainer", "trainer", "trainers", 1)
         verbose_name_plural = npgettext_lazy("trainer", "trainer", "trainers", 2)
+        indexes = [
+            # Trainers who pass `default_excludes`, which nearly every leaderboard query joins on
+            models.Index(
+                fields=["id"],
+                condition=Q(is_banned=False, is_verified=True, is_active=True),
+                name="trainer_eligible_idx",
+            ),
+        ]
 
 
 class Codename(LifecycleModelMixin, models.Model):
@@ -268,7 +377,12 @@ class Codename(LifecycleModelMixin, models.Model):
     @hook("after_save", when="active", is_now=True)
     def on_active_set_username_on_user(self) -> None:
         self.user.username = self.codename
-        self.user.save(update_fields=["username"])
+        self.user.save(update_fields=["username", "last_modified"])
+
+    @hook("after_save")
+    @hook("after_delete")
+    def touch_user(self) -> None:
+        Trainer.objects.filter(pk=self.user_id).touch()
 
     class Meta:
         ordering = ["codename"]
@@ -313,6 +427,11 @@ class FriendCode(LifecycleModelMixin, models.Model):
     def format_code(self):
         self.code = re.sub(r"\D", "", self.code)
 
+    @hook("after_save")
+    @hook("after_delete")
+    def touch_trainer(self) -> None:
+        Trainer.objects.filter(pk=self.trainer_id).touch()
+
     class Meta:
         verbose_name = pgettext_lazy("friend_code_title", "Trainer Code")
         permissions = [
@@ -331,6 +450,33 @@ class FriendCode(LifecycleModelMixin, models.Model):
         ]
 
 
+@receiver(m2m_changed, sender=Trainer.groups.through)
+@receiver(m2m_changed, sender=Trainer.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def touch_on_permissions_changed(
+    sender, instance, action: str, reverse: bool, pk_set: Optional[set], **kwargs
+) -> None:
+    """Touches the trainers whose permissions changed, as they decide who sees friend codes"""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if sender is Group.permissions.through:
+        if not reverse:
+            groups = [instance.pk]
+        else:
+            groups = pk_set if action != "pre_clear" else instance.group_set.values("pk")
+        trainers = Trainer.objects.filter(groups__in=groups)
+    elif not reverse:
+        trainers = Trainer.objects.filter(pk=instance.pk)
+    elif action != "pre_clear":
+        trainers = Trainer.objects.filter(pk__in=pk_set)
+    elif isinstance(instance, Group):
+        trainers = Trainer.objects.filter(groups=instance)
+    else:
+        trainers = Trainer.objects.filter(user_permissions=instance)
+    Trainer.objects.filter(pk__in=trainers.values("pk")).touch()
+
+
 class UpdateQuerySet(models.QuerySet):
     def exclude_banned_trainers(self: models.QuerySet) -> models.QuerySet:
         return self.exclude(trainer__is_banned=True)
@@ -348,6 +494,133 @@ class UpdateQuerySet(models.QuerySet):
             .exclude_deactived_trainers()
         )
 
+    def latest_of_each(self, trainers: Iterable[int], limit: int) -> models.QuerySet:
+        """The latest `limit` updates of each of `trainers`, however long their histories
+
+        Each trainer's are read off the end of `update_trainer_time_idx`, stopping at `limit`.
+        Filtering the result by trainer too would let Postgres read their histories instead.
+        """
+        quote = connection.ops.quote_name
+        latest = RawSQL(
+            """
+            SELECT latest.{uuid} FROM unnest(%s::integer[]) AS trainer(id)
+            CROSS JOIN LATERAL (
+                SELECT {uuid} FROM {table} WHERE {trainer} = trainer.id
+                ORDER BY {update_time} DESC LIMIT %s
+            ) latest
+            """.format(
+                uuid=quote("uuid"),
+                table=quote(self.model._meta.db_table),
+                trainer=quote("trainer_id"),
+                update_time=quote("update_time"),
+            ),
+            [list(trainers), limit],
+        )
+        return self.filter(pk__in=latest)
+
+    def best_before(
+        self, trainer: int, before: datetime.datetime, fields: Iterable[str]
+    ) -> Dict[str, Tuple[Union[int, Decimal], datetime.datetime]]:
+        """The highest value of each field a trainer had before a time, and when they reached it
+
+        Fetched in a single query, each field is a subquery that reads one row off its index.
+
+        Returns
+        -------
+        A dict of field name to (value, update_time), leaving out fields that were never filled in
+        """
+        history = self.filter(trainer=OuterRef("pk"), update_time__lt=before)
+        annotations = {}
+        for name in fields:
+            best = history.exclude(**{name: None}).order_by(f"-{name}", "update_time")
+            annotations[f"{name}__value"] = Subquery(best.values(name)[:1])
+            annotations[f"{name}__datetime"] = Subquery(best.values("update_time")[:1])
+        if not annotations:
+            return {}
+
+        row = Trainer.objects.filter(pk=trainer).values(**annotations).first() or {}
+        return {
+            name: (row[f"{name}__value"], row[f"{name}__datetime"])
+            for name in fields
+            if row.get(f"{name}__value") is not None
+        }
+
+    def ingest(
+        self, updates: List["Update"], batch_size: int = 500
+    ) -> List[Optional[ValidationError]]:
+        """Validates a batch of new updates and saves the valid ones
+
+        Each update is cleaned against the history of its trainer, read once for the whole
+        batch, including the updates before it in the batch that were valid. Fields should
+        already have been validated, by a serializer or `clean_fields`.
+
+        The valid updates are inserted `batch_size` at a time, then the snapshots, ranks and
+        cached leaderboards of their trainers are refreshed once, rather than once per update.
+        All of that is one transaction, so a failure part way saves none of them.
+
+        Returns
+        -------
+        The error of each update, in the same order, None if it was saved
+        """
+        from trainerdex.plausibility import History
+
+        fields = [
+            field.name
+            for field in Update._meta.fields
+            if isinstance(field, (PogoDecimalField, PogoPositiveIntegerField))
+            and field.reversable is False
+        ]
+        history = History(updates, fields=fields)
+        results = []
+        valid = []
+        for update in updates:
+            try:
+                update.clean(
+                    previous=history.best_before(update.trainer_id, update.update_time, fields)
+                )
+            except ValidationError as e:
+                results.append(e)
+            else:
+                results.append(None)
+                history.add(update)
+                valid.append(update)
+
+        if not valid:
+            return results
+
+        with transaction.atomic():
+            for i in range(0, len(valid), batch_size):
+                self.bulk_create(valid[i : i + batch_size])
+
+            trainers = list(Trainer.objects.filter(pk__in={update.trainer_id for update in valid}))
+            TrainerStats.objects.rebuild(trainers=[trainer.pk for trainer in trainers])
+            for trainer in trainers:
+                LeaderboardRank.objects.sync(trainer)
+            Target.objects.filter(trainer__in=trainers).open().check_reached()
+
+        # Not before the updates are in, or the leaderboards could be cached again without them
+        for trainer in trainers:
+            LeaderboardCache.invalidate_trainer(trainer)
+        return results
+
+    def check_values(self, batch_size: int = 500) -> Iterator[Tuple["Update", Dict]]:
+        """Audits every update in the queryset, see `Update.check_values`
+
+        Updates are checked a batch of trainers at a time, reading each batch's history once.
+
+        Returns
+        -------
+        An iterator of (update, warnings) for the updates with any warnings
+        """
+        from trainerdex.plausibility import check_updates
+
+        trainers = list(self.order_by().values_list("trainer", flat=True).distinct())
+        for i in range(0, len(trainers), batch_size):
+            updates = list(self.filter(trainer__in=trainers[i : i + batch_size]))
+            for update, warnings in zip(updates, check_updates(updates)):
+                if warnings:
+                    yield update, warnings
+
 
 class Update(models.Model):
     objects = UpdateQuerySet.as_manager()
@@ -1204,40 +1477,45 @@ class Update(models.Model):
             if getattr(self, x):
                 yield x
 
-    def clean(self) -> None:
+    def clean(
+        self, previous: Dict[str, Tuple[Union[int, Decimal], datetime.datetime]] = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+        previous: dict
+            The trainer's best values before this update, as returned by
+            `UpdateQuerySet.best_before`. Read from the database if not given.
+        """
         super().clean()
         errors = defaultdict(list)
         fields = [
             field
             for field in Update._meta.fields
             if isinstance(field, (PogoDecimalField, PogoPositiveIntegerField))
+            and getattr(self, field.name) is not None
         ]
 
-        if not any([(getattr(self, field.name) is not None) for field in fields]):
+        if not fields:
             raise ValidationError(
                 _("You must fill in at least one field"),
                 code="nodata",
             )
 
-        for field in fields:
-            if getattr(self, field.name) is None:
-                continue
-
-            # Get latest update with that field present, only get the important fields.
-            last_update = (
-                self.trainer.updates.filter(update_time__lt=self.update_time)
-                .exclude(uuid=self.uuid)
-                .exclude(**{field.name: None})
-                .order_by("-update_time")
-                .only(field.name, "update_time")
-                .first()
+        if previous is None:
+            # The best of every submitted stat that can't go down, in a single query
+            previous = Update.objects.exclude(uuid=self.uuid).best_before(
+                self.trainer_id,
+                self.update_time,
+                [field.name for field in fields if field.reversable is False],
             )
 
+        for field in fields:
             # Overall Rules
 
             # Value must be higher than or equal to than previous value
-            if last_update is not None and field.reversable is False:
-                if getattr(self, field.name) < getattr(last_update, field.name):
+            if field.name in previous:
+                if getattr(self, field.name) < previous[field.name][0]:
                     errors[field.name].append(
                         ValidationError(
                             _(
@@ -1287,284 +1565,492 @@ class Update(models.Model):
         -------
         List of exceptions of raise_ False else None
         """
+        from trainerdex.plausibility import check_updates
 
-        warnings = defaultdict(list)
-        fields = [
-            field
-            for field in Update._meta.fields
-            if isinstance(field, (PogoDecimalField, PogoPositiveIntegerField))
+        (warnings,) = check_updates([self])
+
+        if raise_ and warnings:
+            raise ValidationError(warnings)
+        elif not raise_:
+            return warnings
+
+    class Meta:
+        get_latest_by = "update_time"
+        ordering = ["-update_time"]
+        verbose_name = npgettext_lazy("update", "update", "updates", 1)
+        verbose_name_plural = npgettext_lazy("update", "update", "updates", 2)
+        indexes = [
+            models.Index(fields=["trainer", "-update_time"], name="update_trainer_time_idx"),
         ]
 
-        if self.trainer.start_date:
-            start_date = self.trainer.start_date
-        else:
-            start_date = datetime.date(2016, 7, 5)
 
-        config = {
-            "total_xp": {
-                "InterestDate": datetime.datetime.combine(
-                    start_date,
-                    datetime.time.min,
-                ),
-                "DailyLimit": 10000000,
-            },
-            "travel_km": {
-                "InterestDate": datetime.datetime.combine(
-                    start_date,
-                    datetime.time.min,
-                ),
-                "DailyLimit": Decimal("60"),
-            },
-            "capture_total": {
-                "InterestDate": datetime.datetime.combine(
-                    start_date,
-                    datetime.time.min,
-                ),
-                "DailyLimit": 800,
-            },
-            "evolved_total": {
-                "InterestDate": datetime.datetime.combine(
-                    start_date,
-                    datetime.time.min,
-                ),
-                "DailyLimit": 250,
-            },
-            "hatched_total": {
-                "InterestDate": datetime.datetime.combine(
-                    start_date,
-                    datetime.time.min,
-                ),
-                "DailyLimit": 60,
-            },
-            "pokestops_visited": {
-                "InterestDate": datetime.datetime.combine(
-                    start_date,
-                    datetime.time.min,
-                ),
-                "DailyLimit": 500,
-            },
-            "big_magikarp": {
-                "InterestDate": datetime.datetime.combine(
-                    start_date,
-                    datetime.time.min,
-                ),
-                "DailyLimit": 25,
-            },
-            "battle_attack_won": {
-                "InterestDate": datetime.datetime.combine(
-                    start_date,
-                    datetime.time.min,
-                ),
-                "DailyLimit": 500,
-            },
-            "battle_training_won": {
-                "InterestDate": datetime.datetime.combine(
-                    max(start_date, datetime.date(2018, 12, 13)),
-                    datetime.time.min,
-                ),
-                "DailyLimit": 100,
-            },
-            "small_rattata": {
-                "InterestDate": datetime.datetime.combine(
-                    start_date,
-                    datetime.time.min,
-                ),
-                "DailyLimit": 25,
-            },
-            "berries_fed": {
-                "InterestDate": datetime.datetime.combine(
-                    max(start_date, datetime.date(2017, 6, 22)),
-                    datetime.time.min,
-                ),
-                "DailyLimit": 100,
-            },
-            "hours_defended": {
-                "InterestDate": datetime.datetime.combine(
-                    max(start_date, datetime.date(2017, 6, 22)),
-                    datetime.time.min,
-                ),
-                "DailyLimit": 480,
-            },
-            "raid_battle_won": {
-                "InterestDate": datetime.datetime.combine(
-                    max(start_date, datetime.date(2017, 6, 26)),
-                    datetime.time.min,
-                ),
-                "DailyLimit": 100,
-            },
-            "legendary_battle_won": {
-                "InterestDate": datetime.datetime.combine(
-                    max(start_date, datetime.date(2017, 7, 22)),
-                    datetime.time.min,
-                ),
-                "DailyLimit": 100,
-            },
-            "challenge_quests": {
-                "InterestDate": datetime.datetime.combine(
-                    max(start_date, datetime.date(2018, 3, 30)),
-                    datetime.time.min,
-                ),
-                "DailyLimit": 500,
-            },
-            "trading": {
-                "InterestDate": datetime.datetime.combine(
-                    max(start_date, datetime.date(2018, 6, 21)),
-                    datetime.time.min,
-                ),
-                "DailyLimit": 100,
-            },
-            "trading_distance": {
-                "InterestDate": datetime.datetime.combine(
-                    max(start_date, datetime.date(2018, 6, 21)),
-                    datetime.time.min,
-                ),
-                "DailyLimit": 1001800,  # (earth_circumference/2) * trading.DailyLimit
-            },
-        }
+# A trainer's best of each sortable stat, read without scanning their whole history
+for field in Update._meta.fields:
+    if isinstance(field, (PogoDecimalField, PogoPositiveIntegerField)) and field.sortable:
+        Update._meta.indexes.append(
+            models.Index(
+                fields=["trainer", f"-{field.name}"],
+                condition=Q(**{f"{field.name}__isnull": False}),
+                name=f"u_{field.name}_idx",
+            )
+        )
 
-        for field in fields:
-            if getattr(self, field.name) is None:
-                continue  # Nothing to check!
-
-            # Get latest update with that field present, only get the important fields.
-            last_update = (
-                self.trainer.updates.filter(update_time__lt=self.update_time)
-                .exclude(uuid=self.uuid)
-                .exclude(**{field.name: None})
-                .order_by("-update_time")
-                .only(field.name, "update_time")
-                .first()
+
+class TrainerStatsQuerySet(models.QuerySet):
+    def exclude_banned_trainers(self: models.QuerySet) -> models.QuerySet:
+        return self.exclude(trainer__is_banned=True)
+
+    def exclude_unverified_trainers(self: models.QuerySet) -> models.QuerySet:
+        return self.exclude(trainer__is_verified=False)
+
+    def exclude_deactived_trainers(self: models.QuerySet) -> models.QuerySet:
+        return self.exclude(trainer__is_active=False)
+
+    def default_excludes(self: models.QuerySet) -> models.QuerySet:
+        return (
+            self.exclude_banned_trainers()
+            .exclude_unverified_trainers()
+            .exclude_deactived_trainers()
+        )
+
+    def record(self, update: Update) -> "TrainerStats":
+        """Folds a newly created update into its trainer's snapshot"""
+        with transaction.atomic():
+            stats, _ = self.select_for_update().get_or_create(trainer_id=update.trainer_id)
+            changed = stats.record(
+                {field: getattr(update, field) for field in TrainerStats.tracked_fields}
             )
+            if changed:
+                stats.save(update_fields=changed + ["last_modified"])
+        return stats
 
-            if config.get(field.name):
-                if config.get(field.name).get("InterestDate") and config.get(field.name).get(
-                    "DailyLimit"
-                ):
-                    rate_limits = [
-                        {
-                            "stat": 0,
-                            "datetime": config.get(field.name).get("InterestDate"),
-                        },
-                    ]
-                    if last_update:
-                        rate_limits.append(
-                            {
-                                "stat": getattr(last_update, field.name),
-                                "datetime": getattr(last_update, "update_time"),
-                            }
-                        )
-
-                    for x in rate_limits:
-                        stat_delta = getattr(self, field.name) - x["stat"]
-                        delta = getattr(self, "update_time") - x["datetime"]
-                        rate = stat_delta / (delta.total_seconds() / 86400)
-                        DailyLimit = config.get(field.name).get("DailyLimit")
-                        if rate >= DailyLimit:
-                            warnings[field.name].append(
-                                ValidationError(
-                                    _(
-                                        (
-                                            "This value is high."
-                                            " Your daily average is above the threshold of {threshold:,}."
-                                            " Please check you haven't made a mistake."
-                                            "\n\n"
-                                            "Your daily average between {earlier_date} and {later_date} is {average:,}"
-                                        )
-                                    ).format(
-                                        threshold=DailyLimit,
-                                        average=rate,
-                                        earlier_date=x["datetime"],
-                                        later_date=getattr(self, "update_time"),
-                                    ),
-                                    code="excessive",
-                                ),
-                            )
-
-            if field.name == "gymbadges_gold":
-
-                _xcompare = getattr(self, "gymbadges_total")
-                # Check if gymbadges_total is filled in
-                if _xcompare:
-                    # GoldGyms < GymsSeen
-                    # Check if gymbadges_gold is more of less than gymbadges_total
-                    if getattr(self, field.name) > _xcompare:
-                        warnings[field.name].append(
-                            ValidationError(
-                                _(
-                                    (
-                                        "The {badge} you entered is too high."
-                                        " Please check for typos and other mistakes."
-                                        " You can't have more gold gyms than gyms in Total."
-                                        " {value:,}/{expected:,}"
-                                    )
-                                ).format(
-                                    badge=field.verbose_name,
-                                    value=getattr(self, field.name),
-                                    expected=_xcompare,
-                                )
-                            )
-                        )
-                else:
-                    warnings[field.name].append(
-                        ValidationError(
-                            _("You must fill in {other_badge} if filling in {this_badge}.").format(
-                                this_badge=field.verbose_name,
-                                other_badge=Update._meta.get_field("gymbadges_total").verbose_name,
-                            )
-                        )
+    def rebuild(self, trainers: Iterable[int] = None, batch_size: int = 500) -> int:
+        """Recalculates snapshots from the full update history
+
+        Parameters
+        ----------
+        trainers: Iterable[int]
+            Primary keys of the trainers to rebuild, if None every snapshot is rebuilt.
+        batch_size: int
+            How many snapshots to insert per query.
+
+        Returns
+        -------
+        The number of snapshots written
+        """
+        updates = Update.objects.order_by("trainer", "update_time").values(
+            "trainer", *TrainerStats.tracked_fields
+        )
+        existing = self.all()
+        if trainers is not None:
+            trainers = list(trainers)
+            updates = updates.filter(trainer__in=trainers)
+            existing = existing.filter(trainer__in=trainers)
+
+        def snapshots() -> Iterator[TrainerStats]:
+            stats = None
+            for row in updates.iterator():
+                if stats is None or stats.trainer_id != row["trainer"]:
+                    if stats is not None:
+                        yield stats
+                    stats = TrainerStats(trainer_id=row["trainer"])
+                stats.record(row)
+            if stats is not None:
+                yield stats
+
+        count = 0
+        with transaction.atomic():
+            existing.delete()
+            batch = []
+            for stats in snapshots():
+                batch.append(stats)
+                if len(batch) >= batch_size:
+                    count += len(self.bulk_create(batch))
+                    batch = []
+            if batch:
+                count += len(self.bulk_create(batch))
+        return count
+
+
+class TrainerStats(models.Model):
+    """
+    Managed by the system, a snapshot of the best value of every stat a trainer has reached,
+    and when they reached it. Stat columns are generated from the fields on `Update`.
+
+    Kept current as updates are saved, rebuild with `manage.py rebuild_trainer_stats`
+    """
+
+    objects = TrainerStatsQuerySet.as_manager()
+
+    trainer = models.OneToOneField(
+        Trainer,
+        on_delete=models.CASCADE,
+        related_name="stats",
+        verbose_name=Trainer._meta.verbose_name,
+        primary_key=True,
+    )
+    update_time = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=pgettext_lazy("update_time", "Time Updated"),
+    )
+    last_modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name=pgettext_lazy("last_modified", "Last Modified"),
+    )
+
+    stat_fields = [
+        field
+        for field in Update._meta.fields
+        if isinstance(field, (PogoDecimalField, PogoPositiveIntegerField))
+    ]
+    tracked_fields = ["update_time"] + [field.name for field in stat_fields]
+
+    def record(self, values: Dict[str, Union[int, Decimal, datetime.datetime]]) -> List[str]:
+        """Folds the values of an update into the snapshot
+
+        Stats that can't go down keep their highest value and the earliest time it was seen,
+        reversable stats keep their most recent value.
+
+        Returns
+        -------
+        List of the names of fields that were changed
+        """
+        changed = []
+        update_time = values["update_time"]
+
+        if self.update_time is None or update_time > self.update_time:
+            self.update_time = update_time
+            changed.append("update_time")
+
+        for field in self.stat_fields:
+            value = values.get(field.name)
+            if value is None:
+                continue
+
+            current = getattr(self, field.name)
+            reached = getattr(self, f"{field.name}_datetime")
+            if current is None:
+                newer = True
+            elif field.reversable:
+                newer = update_time >= reached
+            else:
+                newer = value > current or (value == current and update_time < reached)
+
+            if newer:
+                setattr(self, field.name, value)
+                setattr(self, f"{field.name}_datetime", update_time)
+                changed += [field.name, f"{field.name}_datetime"]
+
+        return changed
+
+    def __str__(self) -> str:
+        return str(self.trainer)
+
+    class Meta:
+        verbose_name = pgettext_lazy("trainer_stats", "stats")
+        verbose_name_plural = pgettext_lazy("trainer_stats", "stats")
+
+
+for field in TrainerStats.stat_fields:
+    if isinstance(field, PogoDecimalField):
+        TrainerStats.add_to_class(
+            field.name,
+            models.DecimalField(
+                max_digits=field.max_digits,
+                decimal_places=field.decimal_places,
+                null=True,
+                blank=True,
+                verbose_name=field.verbose_name,
+            ),
+        )
+    else:
+        TrainerStats.add_to_class(
+            field.name,
+            models.PositiveIntegerField(null=True, blank=True, verbose_name=field.verbose_name),
+        )
+    TrainerStats.add_to_class(
+        f"{field.name}_datetime",
+        models.DateTimeField(null=True, blank=True, editable=False),
+    )
+
+
+@receiver(post_save, sender=Update)
+def update_trainer_stats(sender, instance: Update, created: bool, **kwargs) -> None:
+    if kwargs.get("raw"):
+        return None
+
+    if created:
+        TrainerStats.objects.record(instance)
+    else:
+        # An edit can lower a value, so the snapshot has to be recalculated
+        TrainerStats.objects.rebuild(trainers=[instance.trainer_id])
+    LeaderboardRank.objects.sync(instance.trainer)
+    LeaderboardCache.invalidate_trainer(instance.trainer)
+
+
+def refresh_trainers(trainers: Set[int]) -> None:
+    """Rebuilds the stats and ranks of trainers who had updates deleted
+
+    Trainers who were deleted along with their updates are skipped, `remove_from_leaderboard_ranks`
+    has already taken them off the boards.
+    """
+    trainers = list(Trainer.objects.filter(pk__in=trainers))
+    if not trainers:
+        return
+    TrainerStats.objects.rebuild(trainers=[trainer.pk for trainer in trainers])
+    for trainer in trainers:
+        LeaderboardRank.objects.sync(trainer)
+        LeaderboardCache.invalidate_trainer(trainer)
+
+
+@receiver(post_delete, sender=Update)
+def remove_from_trainer_stats(sender, instance: Update, **kwargs) -> None:
+    """Refreshes the trainer once the deletion is committed, once however many updates it took"""
+    for savepoints, callback in connection.run_on_commit:
+        if isinstance(callback, functools.partial) and callback.func is refresh_trainers:
+            callback.args[0].add(instance.trainer_id)
+            return
+    transaction.on_commit(functools.partial(refresh_trainers, {instance.trainer_id}))
+
+
+class LeaderboardRankQuerySet(models.QuerySet):
+    def sync(self, trainer: Trainer) -> None:
+        """Moves a trainer to their current place on every board they belong on"""
+        wanted = {}
+        stats = TrainerStats.objects.filter(trainer=trainer).first()
+        if stats is not None and trainer.leaderboard_eligibility():
+            for stat in LeaderboardRank.ranked_stats:
+                value = getattr(stats, stat)
+                if value is None:
+                    continue
+                for board in LeaderboardRank.boards(trainer):
+                    wanted[(stat, board)] = (value, getattr(stats, f"{stat}_datetime"))
+        self._place(trainer, wanted)
+
+    def remove(self, trainer: Trainer) -> None:
+        """Takes a trainer off every board they're on"""
+        self._place(trainer, {})
+
+    def _place(self, trainer: Trainer, wanted: Dict[tuple, tuple]) -> None:
+        """Writes a trainer's rows on every board, then re-ranks the boards their values moved on
+
+        However many stats changed, this is a fixed handful of queries.
+        """
+        current = {(x.stat, x.board): x for x in self.filter(trainer=trainer)}
+        moved, retimed, added = [], [], []
+        for key in current.keys() | wanted.keys():
+            row = current.get(key)
+            value, reached = wanted.get(key, (None, None))
+            if row is not None and value is not None and row.value == value:
+                if row.datetime != reached:
+                    row.datetime = reached
+                    retimed.append(row)
+                continue
+            moved.append(key)
+            if value is not None:
+                stat, board = key
+                # Ranked below, along with everyone else on the board
+                added.append(
+                    LeaderboardRank(
+                        stat=stat,
+                        board=board,
+                        trainer=trainer,
+                        value=value,
+                        datetime=reached,
+                        rank=0,
                     )
+                )
 
-            if field.name == "trading_distance":
+        if retimed:
+            self.bulk_update(retimed, ["datetime"])
+        if not moved:
+            return
 
-                trading = getattr(self, "trading")
-                earth_circumference = 20037.5085
-                max_distance = int(earth_circumference / 2)
-                rate = getattr(self, field.name) / _xcompare
+        with transaction.atomic():
+            self._lock(moved)
+            self.filter(pk__in=[current[key].pk for key in moved if key in current]).delete()
+            self.bulk_create(added)
+            self._rerank(moved)
 
-                # Check if trading is filled in
-                if trading:
-                    # Pilot / Gentleman < Half Earth
-                    if rate >= max_distance:
-                        warnings[field.name].append(
-                            ValidationError(
-                                _(
-                                    (
-                                        "This value is high."
-                                        " Your distance per trade average is above the threshold of {threshold:,}/trade."
-                                        " Please check you haven't made a mistake."
-                                        "\n\n"
-                                        "Your average is {average:,}/trade"
-                                    )
-                                ).format(
-                                    threshold=max_distance,
-                                    average=rate,
-                                ),
-                                code="excessive",
-                            ),
-                        )
-                else:
-                    warnings[field.name].append(
-                        ValidationError(
-                            _("You must fill in {other_badge} if filling in {this_badge}.").format(
-                                this_badge=field.verbose_name,
-                                other_badge=Update._meta.get_field("trading").verbose_name,
-                            )
-                        )
+    def _lock(self, boards: List[Tuple[str, str]]) -> None:
+        """Holds each (stat, board) until the end of the transaction, so they're ranked in turn
+
+        Locks are always taken in the same order, so two trainers can't deadlock on them.
+        """
+        keys = sorted(
+            {zlib.crc32(f"leaderboard:{stat}:{board}".encode()) for stat, board in boards}
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(key) FROM unnest(%s::bigint[]) AS key", [keys]
+            )
+
+    def _rerank(self, boards: List[Tuple[str, str]]) -> None:
+        """Recalculates the dense ranks of each (stat, board) in a single statement
+
+        Only rows whose rank has changed are written, which are those between a trainer's old
+        and new value.
+        """
+        table = connection.ops.quote_name(LeaderboardRank._meta.db_table)
+        pairs = ", ".join(["(%s, %s)"] * len(boards))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} r SET "rank" = ranked."rank"
+                FROM (
+                    SELECT "id", DENSE_RANK() OVER (
+                        PARTITION BY "stat", "board" ORDER BY "value" DESC
+                    ) AS "rank"
+                    FROM {table}
+                    WHERE ("stat", "board") IN ({pairs})
+                ) ranked
+                WHERE r."id" = ranked."id" AND r."rank" <> ranked."rank"
+                """,
+                [x for board in boards for x in board],
+            )
+
+    def rebuild(self) -> int:
+        """Recalculates every board from the stats snapshots
+
+        Returns
+        -------
+        The number of ranks written
+        """
+        quote = connection.ops.quote_name
+        boards = [
+            ("%s", [LeaderboardRank.get_board()], "", "TRUE"),
+            (
+                "%s || t.{}".format(quote("country")),
+                [LeaderboardRank.get_board(country="")],
+                "PARTITION BY t.{}".format(quote("country")),
+                "t.{0} IS NOT NULL AND t.{0} <> ''".format(quote("country")),
+            ),
+            (
+                "%s || t.{}".format(quote("faction_id")),
+                [LeaderboardRank.get_board(faction="")],
+                "PARTITION BY t.{}".format(quote("faction_id")),
+                "TRUE",
+            ),
+        ]
+
+        count = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.all().delete()
+            for stat in LeaderboardRank.ranked_stats:
+                column = quote(TrainerStats._meta.get_field(stat).column)
+                reached = quote(TrainerStats._meta.get_field(f"{stat}_datetime").column)
+                for board, params, partition, condition in boards:
+                    cursor.execute(
+                        f"""
+                        INSERT INTO {quote(LeaderboardRank._meta.db_table)}
+                            ("stat", "board", "trainer_id", "value", "datetime", "rank")
+                        SELECT
+                            %s, {board}, s."trainer_id", s.{column}, s.{reached},
+                            DENSE_RANK() OVER ({partition} ORDER BY s.{column} DESC)
+                        FROM {quote(TrainerStats._meta.db_table)} s
+                        INNER JOIN {quote(Trainer._meta.db_table)} t ON t."id" = s."trainer_id"
+                        WHERE s.{column} IS NOT NULL
+                            AND NOT t."is_banned" AND t."is_verified" AND t."is_active"
+                            AND {condition}
+                        """,
+                        [stat] + params,
                     )
+                    count += cursor.rowcount
+        return count
 
-        if raise_ and warnings:
-            ValidationError(warnings)
-        elif not raise_:
-            return warnings
+
+class LeaderboardRank(models.Model):
+    """
+    Managed by the system, the dense rank of every eligible trainer for each sortable stat,
+    on the global, per-country and per-faction boards.
+
+    Kept current as stats and trainers change, rebuild with `manage.py rebuild_leaderboard_ranks`
+    """
+
+    objects = LeaderboardRankQuerySet.as_manager()
+
+    ranked_stats = [
+        field.name
+        for field in Update._meta.fields
+        if isinstance(field, (PogoDecimalField, PogoPositiveIntegerField))
+        and field.sortable is True
+    ]
+
+    stat = models.CharField(
+        max_length=len(max(ranked_stats, key=len)),
+        choices=[(x, Update._meta.get_field(x).verbose_name) for x in ranked_stats],
+        verbose_name=pgettext_lazy("stat", "stat"),
+    )
+    board = models.CharField(max_length=16)
+    trainer = models.ForeignKey(
+        Trainer,
+        on_delete=models.CASCADE,
+        related_name="ranks",
+        verbose_name=Trainer._meta.verbose_name,
+    )
+    value = models.DecimalField(max_digits=16, decimal_places=2)
+    datetime = models.DateTimeField(null=True, blank=True)
+    rank = models.PositiveIntegerField()
+
+    @staticmethod
+    def get_board(country: str = None, faction: Union[int, str] = None) -> str:
+        if country is not None:
+            return f"country:{country}"
+        elif faction is not None:
+            return f"faction:{faction}"
+        return "global"
+
+    @classmethod
+    def boards(cls, trainer: Trainer) -> List[str]:
+        """The boards a trainer belongs on, if they're eligible"""
+        boards = [cls.get_board(), cls.get_board(faction=trainer.faction_id)]
+        if trainer.country:
+            boards.append(cls.get_board(country=trainer.country.code))
+        return boards
+
+    def __str__(self) -> str:
+        return f"#{self.rank} {self.trainer} ({self.board} {self.stat}: {self.value})"
 
     class Meta:
-        get_latest_by = "update_time"
-        ordering = ["-update_time"]
-        verbose_name = npgettext_lazy("update", "update", "updates", 1)
-        verbose_name_plural = npgettext_lazy("update", "update", "updates", 2)
+        constraints = [
+            models.UniqueConstraint(fields=["stat", "board", "trainer"], name="unique_rank"),
+        ]
+        indexes = [
+            models.Index(fields=["stat", "board", "rank"], name="leaderboard_rank_idx"),
+            models.Index(
+                fields=["stat", "board", "-value", "datetime", "trainer"],
+                name="leaderboard_order_idx",
+            ),
+        ]
+
+
+@receiver(pre_delete, sender=Trainer)
+def remove_from_leaderboard_ranks(sender, instance: Trainer, **kwargs) -> None:
+    LeaderboardRank.objects.remove(instance)
+    LeaderboardCache.invalidate_trainer(instance)
+
+
+class EvidenceQuerySet(models.QuerySet):
+    def submitted(self) -> models.QuerySet:
+        return self.filter(Exists(EvidenceImage.objects.filter(evidence=OuterRef("pk"))))
+
+    def pending(self) -> models.QuerySet:
+        """Evidence with images, waiting to be approved"""
+        return self.filter(approval=False).submitted()
+
+    def for_trainer(self, trainer) -> models.QuerySet:
+        """The profile evidence of `trainer`, which may be an `OuterRef` to a trainer's pk"""
+        return self.filter(
+            content_type=ContentType.objects.get_for_model(Trainer),
+            object_pk=Cast(trainer, models.CharField()),
+            content_field="trainer.profile",
+        )
 
 
 class Evidence(models.Model):
+    objects = EvidenceQuerySet.as_manager()
+
     content_type = models.ForeignKey(
         ContentType,
         on_delete=models.CASCADE,
@@ -1633,6 +2119,14 @@ class Evidence(models.Model):
                 name="unique_request",
             ),
         ]
+        indexes = [
+            # The review queue, evidence is looked up by its object and approved once
+            models.Index(
+                fields=["content_type", "object_pk"],
+                condition=Q(approval=False),
+                name="evidence_pending_idx",
+            ),
+        ]
         verbose_name = npgettext_lazy("evidence", "evidence", "evidence", 1)
         verbose_name_plural = npgettext_lazy("evidence", "evidence", "evidence", 2)
 
@@ -1643,12 +2137,12 @@ def create_evidence(sender, instance: Trainer, created: bool, **kwargs) -> Evide
         return None
 
     if created:
-        evidence, new = Evidence.objects.get_or_create(
-            content_type=ContentType.objects.get(app_label="trainerdex", model="trainer"),
+        # A new trainer can't have any evidence yet, so there's nothing to get
+        return Evidence.objects.create(
+            content_type=ContentType.objects.get_for_model(Trainer),
             object_pk=instance.pk,
             content_field="trainer.profile",
         )
-        return evidence
 
 
 class EvidenceImage(models.Model):
@@ -1663,6 +2157,9 @@ class EvidenceImage(models.Model):
         height_field="height",
         blank=False,
     )
+    # Filled in by `image`, which couldn't be loaded without them
+    width = models.PositiveIntegerField(null=True, editable=False)
+    height = models.PositiveIntegerField(null=True, editable=False)
 
 
 class BaseTarget(models.Model):
@@ -1726,7 +2223,38 @@ class BaseTarget(models.Model):
         ordering = ["stat", "_target"]
 
 
+class TargetQuerySet(models.QuerySet):
+    def open(self) -> models.QuerySet:
+        return self.filter(has_reached=False)
+
+    def check_reached(self) -> int:
+        """Works out `has_reached` and `date_reached` of every target, in one query per stat
+
+        A target is reached when the first of its trainer's updates to meet it was made.
+
+        Returns
+        -------
+        The number of targets checked
+        """
+        checked = 0
+        for stat in self.order_by().values_list("stat", flat=True).distinct():
+            reached = Update.objects.filter(
+                trainer=OuterRef("trainer"),
+                **{f"{stat}__gte": Cast(OuterRef("_target"), Update._meta.get_field(stat))},
+            ).order_by()
+            checked += self.filter(stat=stat).update(
+                has_reached=Exists(reached),
+                date_reached=Subquery(
+                    reached.values("trainer").annotate(first=Min("update_time")).values("first")
+                ),
+                last_modified=timezone.now(),
+            )
+        return checked
+
+
 class Target(LifecycleModelMixin, BaseTarget):
+    objects = TargetQuerySet.as_manager()
+
     trainer = models.ForeignKey(
         Trainer,
         on_delete=models.CASCADE,
@@ -1749,26 +2277,20 @@ class Target(LifecycleModelMixin, BaseTarget):
             "date_reached__help", "The date the target was reached, if known."
         ),
     )
+    last_modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name=pgettext_lazy("last_modified", "Last Modified"),
+    )
 
     @hook("before_create")
     def check_reached(self):
-        qs = (
-            self.trainer.updates.annotate(value=F(self.stat))
-            .exclude(value__isnull=True)
-            .exclude(value__lt=self.target)
-            .order_by("value")
+        """As `TargetQuerySet.check_reached`, for a target that's yet to be saved"""
+        self.date_reached = (
+            self.trainer.updates.filter(**{f"{self.stat}__gte": self.target})
+            .order_by()
+            .aggregate(first=Min("update_time"))["first"]
         )
-
-        log.debug(f"Checking {self.stat} @ {self.target}\n{qs}")
-        if qs.exists():
-            log.debug(f"{qs.first().value} >= {self.target}: {qs.first().value >= self.target}")
-
-        if qs.exists() and qs.first().value >= self.target:
-            self.has_reached = True
-            self.date_reached = qs.first().update_time
-        else:
-            self.has_reached = False
-            self.date_reached = None
+        self.has_reached = self.date_reached is not None
 
     def __str__(self) -> str:
         return f"{'✅' if self.has_reached else '❌'} {super().__str__()}"
@@ -1779,6 +2301,14 @@ class Target(LifecycleModelMixin, BaseTarget):
         ]
 
 
+@receiver(post_save, sender=Update)
+def check_targets(sender, instance: Update, created: bool, **kwargs) -> None:
+    if kwargs.get("raw"):
+        return None
+
+    Target.objects.filter(trainer=instance.trainer_id).open().check_reached()
+
+
 class PresetTarget(BaseTarget):
     name = models.CharField(max_length=200, null=False, blank=False)
     group = models.ForeignKey(
@@ -1809,6 +2339,43 @@ class PresetTargetGroup(models.Model):
     def add_to_trainer(self, trainer: Trainer) -> List[List[Union[Target, bool]]]:
         return [x.add_to_trainer(trainer) for x in self.targets.all()]
 
+    def add_to_trainers(self, trainers: models.QuerySet, batch_size: int = 1000) -> int:
+        """As `add_to_trainer`, for every trainer in `trainers` at once
+
+        Missing targets are inserted in batches and existing ones renamed with a query per
+        preset target, then all of them are checked with `TargetQuerySet.check_reached`.
+        Django 3.1 can't upsert in `bulk_create`, so the two are done separately.
+
+        Returns
+        -------
+        The number of targets checked
+        """
+        presets = list(self.targets.all())
+        pks = list(trainers.order_by().values_list("pk", flat=True).distinct())
+        if not presets or not pks:
+            return 0
+
+        with transaction.atomic():
+            for preset in presets:
+                Target.objects.filter(
+                    trainer__in=pks, stat=preset.stat, _target=preset._target
+                ).exclude(name=preset.name).update(name=preset.name, last_modified=timezone.now())
+            Target.objects.bulk_create(
+                (
+                    Target(
+                        trainer_id=pk, stat=preset.stat, _target=preset._target, name=preset.name
+                    )
+                    for pk in pks
+                    for preset in presets
+                ),
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            targets = Q()
+            for preset in presets:
+                targets |= Q(stat=preset.stat, _target=preset._target)
+            return Target.objects.filter(targets, trainer__in=pks).check_reached()
+
     def __str__(self) -> str:
         return self.name
 
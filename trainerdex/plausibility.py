@@ -0,0 +1,305 @@
+"""Checks updates for values that are possible, but unlikely enough to be worth a second look
+
+Unlike `Update.clean`, nothing here stops an update from being saved. The warnings are shown to
+the trainer so they can correct a typo, or used to find updates that need reviewing.
+
+Rules are compiled once, at import. Checking a batch of updates reads the history of all their
+trainers in one query, so an import or an audit of every update costs the same few queries as
+checking a single one.
+"""
+
+import datetime
+from bisect import bisect_left
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from trainerdex.models import Trainer, Update
+
+Warnings = Dict[str, List[ValidationError]]
+Value = Union[int, Decimal]
+
+# The day Pokémon GO was released, nobody can have gained anything before then
+RELEASE_DATE = datetime.date(2016, 7, 5)
+EARTH_CIRCUMFERENCE = 20037.5085
+MAX_TRADE_DISTANCE = int(EARTH_CIRCUMFERENCE / 2)
+
+
+def midnight(date: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(date, datetime.time.min, tzinfo=timezone.utc)
+
+
+class RateRule(NamedTuple):
+    """A stat can't reasonably grow faster than `daily_limit` a day, counting from `since`"""
+
+    field: str
+    daily_limit: Value
+    since: datetime.datetime
+
+
+def compile_rules(limits: Dict[str, Tuple[Value, datetime.date]]) -> Tuple[RateRule, ...]:
+    return tuple(
+        RateRule(field=field, daily_limit=limit, since=midnight(since))
+        for field, (limit, since) in limits.items()
+    )
+
+
+# The daily limit of each stat, and when it was added to the game
+RATE_RULES = compile_rules(
+    {
+        "total_xp": (10000000, RELEASE_DATE),
+        "travel_km": (Decimal("60"), RELEASE_DATE),
+        "capture_total": (800, RELEASE_DATE),
+        "evolved_total": (250, RELEASE_DATE),
+        "hatched_total": (60, RELEASE_DATE),
+        "pokestops_visited": (500, RELEASE_DATE),
+        "big_magikarp": (25, RELEASE_DATE),
+        "battle_attack_won": (500, RELEASE_DATE),
+        "battle_training_won": (100, datetime.date(2018, 12, 13)),
+        "small_rattata": (25, RELEASE_DATE),
+        "berries_fed": (100, datetime.date(2017, 6, 22)),
+        "hours_defended": (480, datetime.date(2017, 6, 22)),
+        "raid_battle_won": (100, datetime.date(2017, 6, 26)),
+        "legendary_battle_won": (100, datetime.date(2017, 7, 22)),
+        "challenge_quests": (500, datetime.date(2018, 3, 30)),
+        "trading": (100, datetime.date(2018, 6, 21)),
+        # (earth_circumference/2) * trading.daily_limit
+        "trading_distance": (1001800, datetime.date(2018, 6, 21)),
+    }
+)
+RATE_FIELDS = tuple(rule.field for rule in RATE_RULES)
+
+
+class Timeline:
+    """Every value of one stat a trainer has entered, in the order they were entered"""
+
+    def __init__(self) -> None:
+        self.times: List[datetime.datetime] = []
+        self.values: List[Value] = []
+        # The highest value up to and including each entry, and when it was first reached
+        self.bests: List[Tuple[Value, datetime.datetime]] = []
+
+    def add(self, time: datetime.datetime, value: Value) -> None:
+        i = bisect_left(self.times, time)
+        self.times.insert(i, time)
+        self.values.insert(i, value)
+        self.bests.insert(i, (value, time))
+        # Entries are usually added in order, so this rarely goes past the new one
+        for j in range(i, len(self.times)):
+            best = self.bests[j - 1] if j else None
+            if best is None or self.values[j] > best[0]:
+                best = self.values[j], self.times[j]
+            if j > i and self.bests[j] == best:
+                break
+            self.bests[j] = best
+
+    def before(self, time: datetime.datetime) -> Optional[Tuple[Value, datetime.datetime]]:
+        """The latest value entered strictly before `time`"""
+        i = bisect_left(self.times, time)
+        if i == 0:
+            return None
+        return self.values[i - 1], self.times[i - 1]
+
+    def best_before(self, time: datetime.datetime) -> Optional[Tuple[Value, datetime.datetime]]:
+        """The highest value entered strictly before `time`, and when it was first reached"""
+        i = bisect_left(self.times, time)
+        if i == 0:
+            return None
+        return self.bests[i - 1]
+
+
+class History:
+    """The timelines of a batch of trainers, read in one query
+
+    Updates being checked are left out, to be added in their place with `add`,
+    so an update can be compared with the one before it in its batch, saved or not.
+    """
+
+    def __init__(self, updates: Sequence[Update], fields: Iterable[str] = RATE_FIELDS) -> None:
+        self.fields = tuple(fields)
+        trainers = {update.trainer_id for update in updates}
+        self.start_dates = dict(
+            Trainer.objects.filter(pk__in=trainers).values_list("pk", "start_date")
+        )
+        self.timelines: Dict[Tuple[int, str], Timeline] = defaultdict(Timeline)
+
+        checked = {update.uuid for update in updates}
+        rows = (
+            Update.objects.filter(trainer__in=trainers)
+            .order_by("trainer", "update_time")
+            .values_list("uuid", "trainer_id", "update_time", *self.fields)
+        )
+        for uuid, trainer, update_time, *values in rows.iterator():
+            if uuid not in checked:
+                self._add(trainer, update_time, zip(self.fields, values))
+
+    def _add(
+        self, trainer: int, time: datetime.datetime, values: Iterable[Tuple[str, Value]]
+    ) -> None:
+        for field, value in values:
+            if value is not None:
+                self.timelines[trainer, field].add(time, value)
+
+    def add(self, update: Update) -> None:
+        self._add(
+            update.trainer_id,
+            update.update_time,
+            ((field, getattr(update, field)) for field in self.fields),
+        )
+
+    def previous(
+        self, trainer: int, field: str, time: datetime.datetime
+    ) -> Optional[Tuple[Value, datetime.datetime]]:
+        if (trainer, field) not in self.timelines:
+            return None
+        return self.timelines[trainer, field].before(time)
+
+    def best_before(
+        self, trainer: int, time: datetime.datetime, fields: Iterable[str]
+    ) -> Dict[str, Tuple[Value, datetime.datetime]]:
+        """As `UpdateQuerySet.best_before`, without a query"""
+        bests = {}
+        for field in fields:
+            if (trainer, field) in self.timelines:
+                best = self.timelines[trainer, field].best_before(time)
+                if best is not None:
+                    bests[field] = best
+        return bests
+
+    def start(self, trainer: int) -> datetime.datetime:
+        return midnight(self.start_dates.get(trainer) or RELEASE_DATE)
+
+
+def excessive_rate(
+    rule: RateRule, value: Value, when: datetime.datetime, since: Value, then: datetime.datetime
+) -> Optional[ValidationError]:
+    days = (when - then).total_seconds() / 86400
+    if days <= 0:
+        return None
+    gained = value - since
+    if isinstance(gained, Decimal):
+        days = Decimal(days)
+    rate = gained / days
+    if rate < rule.daily_limit:
+        return None
+    return ValidationError(
+        _(
+            (
+                "This value is high."
+                " Your daily average is above the threshold of {threshold:,}."
+                " Please check you haven't made a mistake."
+                "\n\n"
+                "Your daily average between {earlier_date} and {later_date} is {average:,}"
+            )
+        ).format(
+            threshold=rule.daily_limit,
+            average=rate,
+            earlier_date=then,
+            later_date=when,
+        ),
+        code="excessive",
+    )
+
+
+def check_update(update: Update, history: History) -> Warnings:
+    warnings = defaultdict(list)
+    trainer_start = history.start(update.trainer_id)
+
+    for rule in RATE_RULES:
+        value = getattr(update, rule.field)
+        if value is None:
+            continue  # Nothing to check!
+
+        # Averaged since they could first have gained any, and since their last update
+        baselines = [(0, max(trainer_start, rule.since))]
+        previous = history.previous(update.trainer_id, rule.field, update.update_time)
+        if previous:
+            baselines.append(previous)
+        for since, then in baselines:
+            warning = excessive_rate(rule, value, update.update_time, since, then)
+            if warning:
+                warnings[rule.field].append(warning)
+
+    if update.gymbadges_gold is not None:
+        if update.gymbadges_total:
+            # GoldGyms < GymsSeen
+            if update.gymbadges_gold > update.gymbadges_total:
+                warnings["gymbadges_gold"].append(
+                    ValidationError(
+                        _(
+                            (
+                                "The {badge} you entered is too high."
+                                " Please check for typos and other mistakes."
+                                " You can't have more gold gyms than gyms in Total."
+                                " {value:,}/{expected:,}"
+                            )
+                        ).format(
+                            badge=Update._meta.get_field("gymbadges_gold").verbose_name,
+                            value=update.gymbadges_gold,
+                            expected=update.gymbadges_total,
+                        )
+                    )
+                )
+        else:
+            warnings["gymbadges_gold"].append(
+                ValidationError(
+                    _("You must fill in {other_badge} if filling in {this_badge}.").format(
+                        this_badge=Update._meta.get_field("gymbadges_gold").verbose_name,
+                        other_badge=Update._meta.get_field("gymbadges_total").verbose_name,
+                    )
+                )
+            )
+
+    if update.trading_distance is not None:
+        if update.trading:
+            # Pilot / Gentleman < Half Earth
+            rate = update.trading_distance / update.trading
+            if rate >= MAX_TRADE_DISTANCE:
+                warnings["trading_distance"].append(
+                    ValidationError(
+                        _(
+                            (
+                                "This value is high."
+                                " Your distance per trade average is above the threshold of {threshold:,}/trade."
+                                " Please check you haven't made a mistake."
+                                "\n\n"
+                                "Your average is {average:,}/trade"
+                            )
+                        ).format(
+                            threshold=MAX_TRADE_DISTANCE,
+                            average=rate,
+                        ),
+                        code="excessive",
+                    ),
+                )
+        else:
+            warnings["trading_distance"].append(
+                ValidationError(
+                    _("You must fill in {other_badge} if filling in {this_badge}.").format(
+                        this_badge=Update._meta.get_field("trading_distance").verbose_name,
+                        other_badge=Update._meta.get_field("trading").verbose_name,
+                    )
+                )
+            )
+
+    return warnings
+
+
+def check_updates(updates: Iterable[Update]) -> List[Warnings]:
+    """Checks a batch of updates in one pass
+
+    Returns
+    -------
+    The warnings of each update, in the same order, as `Update.check_values` would return them
+    """
+    updates = list(updates)
+    if not updates:
+        return []
+    history = History(updates)
+    for update in updates:
+        history.add(update)
+    return [check_update(update, history) for update in updates]
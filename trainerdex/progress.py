@@ -0,0 +1,116 @@
+"""Works out how far a trainer is through each of their targets, and when they'll reach them
+
+A target's projection follows the trainer's recent growth in its stat, from their first update
+in the `RECENT` days before their latest to the latest itself. If that's just the one update,
+their whole history is used instead. Every target is worked out from one aggregate query over
+the trainer's updates, and the result only changes when their updates or targets do.
+"""
+
+import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from django.db.models import DateTimeField, ExpressionWrapper, Max, Min, Q, Subquery
+
+from trainerdex.models import Target, Trainer, Update
+
+Value = Union[int, Decimal]
+
+RECENT = datetime.timedelta(days=30)
+
+
+class Progress(NamedTuple):
+    target: Target
+    # The trainer's latest value of the target's stat, and when they entered it
+    value: Optional[Value]
+    time: Optional[datetime.datetime]
+    # How much of the target has been reached, out of 100
+    percent: Decimal
+    # How much the stat has grown by a day, recently
+    rate: Optional[Decimal]
+    # When the target will be reached at that rate, None if it has been or never will be
+    eta: Optional[datetime.datetime]
+
+
+def get_growth(trainer: Trainer, stats: Iterable[str]) -> Dict[str, Dict[str, object]]:
+    """The latest, recent and first value of each stat, with when they were entered"""
+    updates = Update.objects.filter(trainer=trainer).order_by()
+    latest = Subquery(updates.order_by("-update_time").values("update_time")[:1])
+    recent = Q(update_time__gte=ExpressionWrapper(latest - RECENT, output_field=DateTimeField()))
+    aggregates = {}
+    for stat in stats:
+        entered = Q(**{f"{stat}__isnull": False})
+        # Targets are only set on stats that can't go down, so the highest value is the latest
+        aggregates.update(
+            {
+                f"{stat}_value": Max(stat),
+                f"{stat}_time": Max("update_time", filter=entered),
+                f"{stat}_recent_value": Min(stat, filter=recent),
+                f"{stat}_recent_time": Min("update_time", filter=entered & recent),
+                f"{stat}_first_value": Min(stat),
+                f"{stat}_first_time": Min("update_time", filter=entered),
+            }
+        )
+    if not aggregates:
+        return {}
+    row = updates.aggregate(**aggregates)
+    return {
+        stat: {
+            key: row[f"{stat}_{key}"]
+            for key in (
+                "value",
+                "time",
+                "recent_value",
+                "recent_time",
+                "first_value",
+                "first_time",
+            )
+        }
+        for stat in stats
+    }
+
+
+def get_rate(growth: Dict[str, object]) -> Optional[Decimal]:
+    baselines: List[Tuple[Optional[Value], Optional[datetime.datetime]]] = [
+        (growth["recent_value"], growth["recent_time"]),
+        (growth["first_value"], growth["first_time"]),
+    ]
+    for since, then in baselines:
+        if then is not None and then < growth["time"]:
+            days = Decimal((growth["time"] - then).total_seconds()) / 86400
+            return (Decimal(growth["value"]) - Decimal(since)) / days
+    return None
+
+
+def get_progress(trainer: Trainer, targets: Optional[Iterable[Target]] = None) -> List[Progress]:
+    """The progress of each of a trainer's targets, all of them if `targets` isn't given"""
+    targets = list(trainer.targets.all() if targets is None else targets)
+    growths = get_growth(trainer, {target.stat for target in targets})
+
+    progress = []
+    for target in targets:
+        growth = growths[target.stat]
+        value, goal = growth["value"], target.target
+        if value is None:
+            progress.append(Progress(target, None, None, Decimal(0), None, None))
+            continue
+
+        percent = Decimal(100) if not goal else min(Decimal(100), Decimal(value) * 100 / goal)
+        rate = get_rate(growth)
+        eta = None
+        if value < goal and rate is not None and rate > 0:
+            try:
+                eta = growth["time"] + datetime.timedelta(days=float((goal - value) / rate))
+            except OverflowError:
+                pass  # Not in this millennium
+        progress.append(
+            Progress(
+                target=target,
+                value=value,
+                time=growth["time"],
+                percent=percent.quantize(Decimal("0.01")),
+                rate=None if rate is None else rate.quantize(Decimal("0.01")),
+                eta=eta,
+            )
+        )
+    return progress
@@ -0,0 +1,73 @@
+"""Helpers for tests
+
+`QueryBudgetMixin` fails a test when an endpoint runs more queries than it's budgeted.
+Budgets are declared per endpoint, as `QueryMetricsMiddleware` tags them::
+
+    class TrainerAPITests(QueryBudgetMixin, APITestCase):
+        query_budgets = {
+            "trainerdex.api.v1.views.TrainerViewSet.list": 4,
+            "trainerdex.api.v2.views.LeaderboardView.get": 3,
+        }
+
+        def test_list(self):
+            self.assertWithinQueryBudget(self.client.get("/api/v1/trainers/"))
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from django.test import override_settings
+
+from trainerdex.instrumentation import QueryTimer, RequestMetrics, timed_queries
+
+
+def over_budget(name: str, queries: int, budget: int, statements) -> str:
+    return f"{name} ran {queries} queries, over its budget of {budget}:\n" + "\n".join(
+        f"  {sql}" for sql in statements or []
+    )
+
+
+class QueryBudgetMixin:
+    query_budgets: Dict[str, int] = {}
+
+    @classmethod
+    def setUpClass(cls):
+        # So a test over budget can show what it ran
+        cls._query_statements = override_settings(QUERY_METRICS_STATEMENTS=True)
+        cls._query_statements.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._query_statements.disable()
+
+    def assertWithinQueryBudget(self, response, budget: Optional[int] = None) -> RequestMetrics:
+        """Fails if the request behind `response` ran more queries than its endpoint's budget
+
+        Parameters
+        ----------
+        budget: int
+            Overrides the budget in `query_budgets`
+        """
+        metrics = getattr(response, "query_metrics", None)
+        if metrics is None:
+            self.fail("The response has no query metrics, is QueryMetricsMiddleware installed?")
+        if budget is None:
+            if metrics.endpoint not in self.query_budgets:
+                self.fail(f"{metrics.endpoint} has no query budget")
+            budget = self.query_budgets[metrics.endpoint]
+        if metrics.queries > budget:
+            self.fail(
+                over_budget(metrics.endpoint, metrics.queries, budget, metrics.timer.statements)
+            )
+        return metrics
+
+
+@contextmanager
+def query_budget(budget: int, name: str = "The block") -> Iterator[QueryTimer]:
+    """Fails if the block runs more than `budget` queries, for code outside of a request"""
+    with timed_queries(statements=True) as timer:
+        yield timer
+    if timer.queries > budget:
+        raise AssertionError(over_budget(name, timer.queries, budget, timer.statements))
@@ -0,0 +1,86 @@
+import datetime
+
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+
+from oauth2_provider.models import AccessToken
+
+from trainerdex.models import Codename, FriendCode, Trainer, Update
+
+
+class ConditionalGetTests(TestCase):
+    fixtures = ["factions"]
+
+    @classmethod
+    def setUpTestData(cls):
+        trainer = Trainer.objects.create(username="Conditional", faction_id=2, is_verified=True)
+        Trainer.objects.filter(pk=trainer.pk).update(tid=trainer.pk)
+        for days in (30, 20, 10):
+            Update.objects.create(
+                trainer=trainer,
+                update_time=timezone.now() - datetime.timedelta(days=days),
+                total_xp=100000 - days * 1000,
+            )
+
+    def setUp(self):
+        self.trainer = Trainer.objects.get(username="Conditional")
+
+    def test_not_modified(self):
+        url = f"/api/v1/trainers/{self.trainer.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_codename_change(self):
+        url = f"/api/v1/trainers/{self.trainer.pk}/"
+        etag = self.client.get(url)["ETag"]
+        Codename.objects.create(user=self.trainer, codename="Renamed", active=True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["username"], "Renamed")
+
+    def test_friend_code_change(self):
+        url = f"/api/v1/trainers/{self.trainer.pk}/"
+        FriendCode.objects.create(trainer=self.trainer, code="1234 5678 9012")
+        etag = self.client.get(url)["ETag"]
+        self.trainer.user_permissions.add(
+            Permission.objects.get(codename="share_friend_code_to_api")
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["friend_code"], "123456789012")
+
+        friend_code = FriendCode.objects.get(pk=self.trainer.pk)
+        friend_code.code = "2109 8765 4321"
+        friend_code.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["friend_code"], "210987654321")
+
+    def test_codename_added(self):
+        token = AccessToken.objects.create(
+            user=self.trainer,
+            token="conditional",
+            scope="profile:read",
+            expires=timezone.now() + datetime.timedelta(hours=1),
+        )
+        url = f"/api/v2/trainers/{self.trainer.pk}/"
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token.token}"}
+        etag = self.client.get(url, **headers)["ETag"]
+        Codename.objects.create(user=self.trainer, codename="Alt", active=False)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Alt", [codename["codename"] for codename in response.data["codenames"]])
+
+    def test_deleted_from_list(self):
+        url = f"/api/v1/trainers/{self.trainer.pk}/updates/"
+        response = self.client.get(url)
+        self.assertNotIn("Last-Modified", response)
+        Update.objects.filter(trainer=self.trainer).earliest("update_time").delete()
+        for headers in [
+            {"HTTP_IF_NONE_MATCH": response["ETag"]},
+            {"HTTP_IF_MODIFIED_SINCE": http_date(timezone.now().timestamp())},
+        ]:
+            with self.subTest(headers=headers):
+                self.assertEqual(self.client.get(url, **headers).status_code, 206)
@@ -0,0 +1,61 @@
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import TransactionTestCase
+from django.utils import timezone
+from oauth2_provider.models import AccessToken
+
+from trainerdex.models import Trainer, Update
+
+
+class ExportTests(TransactionTestCase):
+    """Under ASGI, exports are streamed on the event loop, where the database can't be used"""
+
+    fixtures = ["factions"]
+
+    def setUp(self):
+        self.trainer = Trainer.objects.create(username="Export", faction_id=3, is_verified=True)
+        Trainer.objects.filter(pk=self.trainer.pk).update(tid=self.trainer.pk)
+        for days in (30, 20, 10):
+            Update.objects.create(
+                trainer=self.trainer,
+                update_time=timezone.now() - datetime.timedelta(days=days),
+                total_xp=100000 - days * 1000,
+            )
+
+    async def test_ndjson(self):
+        response = await self.async_client.get(
+            f"/api/v1/trainers/{self.trainer.pk}/updates/?format=ndjson"
+        )
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 3)
+
+    async def test_csv(self):
+        response = await self.async_client.get(
+            f"/api/v1/trainers/{self.trainer.pk}/updates/?format=csv"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 4)
+
+    async def test_v2(self):
+        token = await sync_to_async(AccessToken.objects.create)(
+            user=self.trainer,
+            token="export",
+            scope="update:read",
+            expires=timezone.now() + datetime.timedelta(hours=1),
+        )
+        response = await self.async_client.get(
+            f"/api/v2/trainers/{self.trainer.pk}/updates/?format=ndjson",
+            authorization=f"Bearer {token.token}",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 3)
+
+    def test_wsgi(self):
+        response = self.client.get(
+            f"/api/v1/trainers/{self.trainer.pk}/updates/", {"format": "ndjson"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 3)
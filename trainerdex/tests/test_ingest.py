@@ -0,0 +1,72 @@
+import datetime
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import resolve
+from django.utils import timezone
+
+from trainerdex.models import LeaderboardRankQuerySet, Trainer, Update
+from trainerdex.plausibility import Timeline
+
+
+class IngestTests(TestCase):
+    fixtures = ["factions"]
+
+    @classmethod
+    def setUpTestData(cls):
+        trainer = Trainer.objects.create(username="Ingest", faction_id=1, is_verified=True)
+        for days in (30, 20, 10):
+            Update.objects.create(
+                trainer=trainer,
+                update_time=timezone.now() - datetime.timedelta(days=days),
+                total_xp=100000 - days * 1000,
+            )
+
+    def setUp(self):
+        self.trainer = Trainer.objects.get(username="Ingest")
+
+    def new_updates(self):
+        latest = Update.objects.filter(trainer=self.trainer).latest("update_time")
+        return [
+            Update(
+                trainer=self.trainer,
+                update_time=timezone.now() - datetime.timedelta(days=days),
+                total_xp=latest.total_xp + 1000 * (10 - days),
+            )
+            for days in (2, 1)
+        ]
+
+    def test_ingest(self):
+        updates = self.new_updates()
+        self.assertEqual(Update.objects.ingest(updates), [None, None])
+        self.assertEqual(Update.objects.filter(uuid__in=[x.uuid for x in updates]).count(), 2)
+
+    def test_rolled_back_on_failure(self):
+        count = Update.objects.count()
+        with mock.patch.object(LeaderboardRankQuerySet, "sync", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                Update.objects.ingest(self.new_updates())
+        self.assertEqual(Update.objects.count(), count)
+
+    def test_nested_bulk(self):
+        self.assertEqual(resolve("/api/v2/updates/bulk/").url_name, "update-bulk")
+        # Taken for an update's UUID instead
+        nested = resolve(f"/api/v2/trainers/{self.trainer.pk}/updates/bulk/")
+        self.assertEqual(nested.url_name, "trainers-update-detail")
+
+
+class TimelineTests(SimpleTestCase):
+    def test_best_before(self):
+        day = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        timeline = Timeline()
+        for days, value in [(0, 10), (4, 30), (2, 30), (6, 20), (1, 5)]:
+            timeline.add(day + datetime.timedelta(days=days), value)
+
+        self.assertIsNone(timeline.best_before(day))
+        self.assertEqual(timeline.best_before(day + datetime.timedelta(days=2)), (10, day))
+        # The first time the highest value was reached
+        for days in (3, 5, 7):
+            self.assertEqual(
+                timeline.best_before(day + datetime.timedelta(days=days)),
+                (30, day + datetime.timedelta(days=2)),
+            )
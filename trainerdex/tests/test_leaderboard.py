@@ -0,0 +1,137 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from trainerdex.models import Codename, LeaderboardRank, Trainer, TrainerStats, Update
+from trainerdex.testing import query_budget
+
+
+class LeaderboardPaginationTests(APITestCase):
+    fixtures = ["factions"]
+
+    @classmethod
+    def setUpTestData(cls):
+        # Ten trainers, each a thousand XP ahead of the one before
+        for n in range(10):
+            trainer = Trainer.objects.create(
+                username=f"Trainer{n}", faction_id=n % 3 + 1, country="GB", is_verified=True
+            )
+            Update.objects.create(
+                trainer=trainer, update_time=timezone.now(), total_xp=(n + 1) * 1000
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.trainer = Trainer.objects.get(username="Trainer4")
+
+    def get_ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [row["trainer"]["id"] for row in response.data["results"]]
+
+    def get_codenames(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [row["trainer"]["codename"] for row in response.data["results"]]
+
+    def test_focus(self):
+        everyone = self.get_ids(self.client.get("/api/v2/leaderboard/", {"limit": 100}))
+        for trainer in [everyone[0], everyone[len(everyone) // 2], everyone[-1]]:
+            with self.subTest(trainer=trainer):
+                response = self.client.get("/api/v2/leaderboard/", {"limit": 4, "focus": trainer})
+                self.assertIn(trainer, self.get_ids(response))
+
+    def test_focus_outside_board(self):
+        self.trainer.is_banned = True
+        self.trainer.save()
+        response = self.client.get("/api/v2/leaderboard/", {"limit": 4, "focus": self.trainer.pk})
+        self.assertEqual(response.status_code, 400)
+
+    def test_order_by(self):
+        for o, code in [("travel_km", 200), ("update_time", 400), ("trainer", 400)]:
+            with self.subTest(o=o):
+                response = self.client.get("/api/v2/leaderboard/", {"limit": 4, "o": o})
+                self.assertEqual(response.status_code, code)
+
+    def test_invalid_count(self):
+        response = self.client.get("/api/v2/leaderboard/", {"limit": 4, "count": "maybe"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("count", response.data)
+
+    def test_codename_change(self):
+        url = "/api/v2/leaderboard/"
+        self.assertIn(self.trainer.username, self.get_codenames(self.client.get(url)))
+        Codename.objects.create(user=self.trainer, codename="Renamed", active=True)
+        self.assertIn("Renamed", self.get_codenames(self.client.get(url)))
+
+
+class LeaderboardRankTests(TransactionTestCase):
+    """Deleted updates are only taken off the boards once the deletion is committed"""
+
+    fixtures = ["factions"]
+
+    def setUp(self):
+        # Spread over two countries and every team, with some of them tied
+        now = timezone.now()
+        for n, (country, xp, km) in enumerate(
+            [
+                ("GB", 5000, 10),
+                ("GB", 3000, 25),
+                ("US", 5000, 5),
+                ("US", 1000, 25),
+                ("GB", 4000, 1),
+            ]
+        ):
+            trainer = Trainer.objects.create(
+                username=f"Trainer{n}", faction_id=n % 3 + 1, country=country, is_verified=True
+            )
+            for days, factor in [(20, 0.5), (10, 1)]:
+                Update.objects.create(
+                    trainer=trainer,
+                    update_time=now - datetime.timedelta(days=days),
+                    total_xp=int(xp * factor),
+                    travel_km=km * factor,
+                )
+        self.trainer = Trainer.objects.get(username="Trainer1")
+
+    def assertRanksCurrent(self):
+        ranks = set(LeaderboardRank.objects.values_list("stat", "board", "trainer", "rank"))
+        LeaderboardRank.objects.rebuild()
+        self.assertEqual(
+            ranks, set(LeaderboardRank.objects.values_list("stat", "board", "trainer", "rank"))
+        )
+
+    def test_update_every_stat(self):
+        stats = TrainerStats.objects.get(trainer=self.trainer)
+        values = {
+            stat: (getattr(stats, stat) or 0) + 1000 for stat in LeaderboardRank.ranked_stats
+        }
+        # However many stats change, ranking them costs the same
+        with query_budget(16, "Saving an update"):
+            Update.objects.create(trainer=self.trainer, update_time=timezone.now(), **values)
+        self.assertRanksCurrent()
+
+    def test_delete_update(self):
+        Update.objects.filter(trainer=self.trainer).latest("update_time").delete()
+        self.assertRanksCurrent()
+
+    def test_delete_updates(self):
+        # Each of the five trainers is refreshed once, however many of their updates go
+        with query_budget(35, "Deleting every update"):
+            Update.objects.all().delete()
+        self.assertFalse(LeaderboardRank.objects.exists())
+        self.assertRanksCurrent()
+
+    def test_delete_trainer(self):
+        # Their updates go with them, without refreshing a trainer who's gone
+        with query_budget(30, "Deleting a trainer"):
+            self.trainer.delete()
+        self.assertFalse(LeaderboardRank.objects.filter(trainer=self.trainer).exists())
+        self.assertRanksCurrent()
+
+    def test_ban(self):
+        self.trainer.is_banned = True
+        self.trainer.save()
+        self.assertFalse(LeaderboardRank.objects.filter(trainer=self.trainer).exists())
+        self.assertRanksCurrent()
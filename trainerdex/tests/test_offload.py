@@ -0,0 +1,59 @@
+import asyncio
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TransactionTestCase
+
+from trainerdex.api.v1.views import TrainerViewSet
+from trainerdex.models import Trainer
+
+
+class OffloadTests(TransactionTestCase):
+    """Under ASGI, offloaded reads run on a worker thread, through every middleware"""
+
+    fixtures = ["factions"]
+
+    def setUp(self):
+        self.trainer = Trainer.objects.create(username="Offload", faction_id=1, is_verified=True)
+        Trainer.objects.filter(pk=self.trainer.pk).update(tid=self.trainer.pk)
+
+    async def test_offloaded(self):
+        sync_thread = await sync_to_async(threading.get_ident)()
+        started, released = threading.Event(), threading.Event()
+        seen = []
+        retrieve = TrainerViewSet.retrieve
+
+        def blocking(viewset, *args, **kwargs):
+            seen.append(threading.get_ident())
+            started.set()
+            seen.append(released.wait(5))
+            return retrieve(viewset, *args, **kwargs)
+
+        with mock.patch.object(TrainerViewSet, "retrieve", blocking):
+            request = asyncio.ensure_future(
+                self.async_client.get(f"/api/v1/trainers/{self.trainer.pk}/")
+            )
+            self.assertTrue(await sync_to_async(started.wait, thread_sensitive=False)(5))
+            # The thread synchronous code shares is left free while the view runs
+            await sync_to_async(released.set)()
+            response = await request
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(seen[0], sync_thread)
+        self.assertTrue(seen[1])
+        self.assertGreater(response.query_metrics.queries, 0)
+
+    async def test_inline(self):
+        sync_thread = await sync_to_async(threading.get_ident)()
+        threads = []
+        list_ = TrainerViewSet.list
+
+        def recorded(viewset, *args, **kwargs):
+            threads.append(threading.get_ident())
+            return list_(viewset, *args, **kwargs)
+
+        with mock.patch.object(TrainerViewSet, "list", recorded):
+            response = await self.async_client.get("/api/v1/trainers/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(threads, [sync_thread])
+        self.assertGreater(response.query_metrics.queries, 0)
@@ -0,0 +1,112 @@
+import datetime
+from typing import Any, Dict
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+from oauth2_provider.models import AccessToken
+from rest_framework.test import APITestCase
+
+from trainerdex.models import Codename, Trainer, Update
+from trainerdex.testing import QueryBudgetMixin
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """The busiest endpoints cost the same few queries however many trainers they return"""
+
+    # Including looking up the access token, which the v2 endpoints do twice
+    query_budgets = {
+        "trainerdex.api.v1.views.TrainerViewSet.list": 7,
+        "trainerdex.api.v1.views.TrainerViewSet.retrieve": 6,
+        "trainerdex.api.v2.views.LeaderboardView.get": 3,
+        "trainerdex.api.v2.views.TrainerViewSet.list": 6,
+        "trainerdex.api.v2.views.TrainerViewSet.retrieve": 7,
+    }
+
+    fixtures = ["factions"]
+
+    @classmethod
+    def setUpTestData(cls):
+        # Twenty trainers, each with an old codename and a few updates
+        now = timezone.now()
+        for n in range(20):
+            trainer = Trainer.objects.create(
+                username=f"Budget{n}", faction_id=n % 3 + 1, country="GB", is_verified=True
+            )
+            Codename.objects.create(user=trainer, codename=f"OldBudget{n}", active=False)
+            for days in (30, 20, 10):
+                Update.objects.create(
+                    trainer=trainer,
+                    update_time=now - datetime.timedelta(days=days),
+                    total_xp=(n + 1) * 100000 - days * 1000,
+                )
+        Trainer.objects.update(tid=F("pk"))
+
+    def setUp(self):
+        self.trainer = Trainer.objects.get(username="Budget0")
+
+        cache.clear()
+        token = AccessToken.objects.create(
+            user=self.trainer,
+            token="budget",
+            scope="profile:read",
+            expires=timezone.now() + datetime.timedelta(hours=1),
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.token}")
+
+    def test_v1_trainers(self):
+        self.assertWithinQueryBudget(self.client.get("/api/v1/trainers/"))
+        self.assertWithinQueryBudget(self.client.get(f"/api/v1/trainers/{self.trainer.pk}/"))
+
+    def test_leaderboard(self):
+        self.assertWithinQueryBudget(self.client.get("/api/v2/leaderboard/"))
+
+    def test_v2_trainers(self):
+        self.assertWithinQueryBudget(self.client.get("/api/v2/trainers/"))
+        self.assertWithinQueryBudget(self.client.get(f"/api/v2/trainers/{self.trainer.pk}/"))
+
+
+class UpdateSetTests(TestCase):
+    """A trainer's latest updates are read without going through the rest of their history"""
+
+    fixtures = ["factions"]
+
+    @classmethod
+    def setUpTestData(cls):
+        trainer = Trainer.objects.create(username="History", faction_id=1, is_verified=True)
+        now = timezone.now()
+        Update.objects.bulk_create(
+            [
+                Update(
+                    trainer=trainer,
+                    update_time=now - datetime.timedelta(days=days),
+                    total_xp=1000000 - days * 1000,
+                )
+                for days in range(200)
+            ]
+        )
+
+    def rows_read(self, plan: Dict[str, Any]) -> int:
+        """How many rows every scan of the update table read, counting those it filtered out"""
+        rows = 0
+        if plan.get("Relation Name") == Update._meta.db_table:
+            read = plan["Actual Rows"] + plan.get("Rows Removed by Filter", 0)
+            rows += read * plan["Actual Loops"]
+        for child in plan.get("Plans", []):
+            rows += self.rows_read(child)
+        return rows
+
+    def test_latest_of_each(self):
+        trainer = Trainer.objects.get(username="History")
+        updates = Update.objects.latest_of_each([trainer.pk], 5)
+        sql, params = updates.query.sql_with_params()
+        with connection.cursor() as cursor:
+            # Planned as on a full table, which wouldn't be read whole for a few trainers
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"ANALYZE {Update._meta.db_table}")
+            cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params)
+            ((plan,),) = cursor.fetchall()
+        self.assertEqual(plan[0]["Plan"]["Actual Rows"], 5)
+        self.assertLessEqual(self.rows_read(plan[0]["Plan"]), 10)